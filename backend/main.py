@@ -12,7 +12,7 @@ from typing import Optional
 from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
 
-from fastapi import FastAPI, HTTPException, Query, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Query, BackgroundTasks, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from pydantic import BaseModel
@@ -528,7 +528,12 @@ async def get_trip_geojson(device_id: str, date: str):
     if not trip_data:
         raise HTTPException(status_code=404, detail=f"No data found for device {device_id} on {date}")
     
-    return build_geojson_route(trip_data)
+    # Serialize in the service (orjson when installed) and hand FastAPI the
+    # bytes directly, bypassing the default jsonable_encoder pass
+    return Response(
+        content=build_geojson_route(trip_data, serialize=True),
+        media_type="application/json"
+    )
 
 
 @app.get("/api/trip/{device_id}/{date}/3d")
@@ -557,6 +562,18 @@ async def get_links():
     return build_link_network_geojson(links, cache)
 
 
+@app.get("/api/links/{link_id}/path.bin")
+async def get_link_path_binary(link_id: int):
+    """Serve a link's GPS path as raw little-endian float32 [lng, lat] pairs."""
+    if not cache:
+        raise HTTPException(status_code=503, detail="Cache not initialized")
+    
+    return Response(
+        content=cache.get_link_path_binary(link_id),
+        media_type="application/octet-stream"
+    )
+
+
 @app.get("/api/image/{camera_type}/{device_id}/{date}/{sequence}/{filename:path}")
 async def get_image(
     camera_type: str,
@@ -12,9 +12,10 @@ Optimized with:
 - File path deduplication to prevent same image matching multiple signs
 """
 import math
+import sys
 import numpy as np
 from typing import List, Dict, Any, Tuple, Optional, Literal
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from functools import lru_cache
 import time
 
@@ -33,6 +34,15 @@ COLORS = {
     'new_finding': '#eab308' # Yellow
 }
 
+# Pre-bound per-feature constants for result_to_geojson: avoids re-resolving
+# the COLORS dict and re-allocating status strings for every feature
+_STATUS_MATCHED = sys.intern('matched')
+_STATUS_UNDETECTED = sys.intern('undetected')
+_STATUS_NEW_FINDING = sys.intern('new_finding')
+_COLOR_MATCHED = COLORS['matched']
+_COLOR_UNDETECTED = COLORS['undetected']
+_COLOR_NEW_FINDING = COLORS['new_finding']
+
 # Supported algorithms
 MATCHING_ALGORITHMS = ['greedy_nearest', 'hungarian', 'mutual_nearest']
 AlgorithmType = Literal['greedy_nearest', 'hungarian', 'mutual_nearest']
@@ -40,11 +50,21 @@ AlgorithmType = Literal['greedy_nearest', 'hungarian', 'mutual_nearest']
 
 @dataclass
 class MatchResult:
-    """Result of matching analysis."""
-    matched: List[Dict[str, Any]]       # NYC signs that we also detected
-    undetected: List[Dict[str, Any]]    # NYC signs that we missed
-    new_findings: List[Dict[str, Any]]  # Our detections not in NYC DB
-    
+    """Result of matching analysis.
+
+    Matches are stored as lightweight (nyc_idx, det_idx, distance) index
+    pairs referencing the original sign/detection lists instead of full
+    dict copies; the dict-based `matched`/`undetected` views are
+    materialized lazily on first access for backward compatibility.
+    """
+    matched_pairs: List[Tuple[int, int, float]]  # (nyc_idx, det_idx, distance)
+    undetected_indices: List[int]                # Indices of NYC signs we missed
+    new_findings: List[Dict[str, Any]]           # Our detections not in NYC DB
+
+    # Source data referenced by the index pairs
+    nyc_signs: List[Dict[str, Any]]
+    our_detections: List[Dict[str, Any]]
+
     # Statistics
     total_nyc: int
     total_detections: int
@@ -55,6 +75,35 @@ class MatchResult:
     processing_time_ms: float = 0
     algorithm: str = 'greedy_nearest'
 
+    # Lazily materialized dict views
+    _matched_view: Optional[List[Dict[str, Any]]] = field(default=None, init=False, repr=False)
+    _undetected_view: Optional[List[Dict[str, Any]]] = field(default=None, init=False, repr=False)
+
+    @property
+    def matched(self) -> List[Dict[str, Any]]:
+        """NYC signs that we also detected (materialized on demand)."""
+        if self._matched_view is None:
+            self._matched_view = [
+                {
+                    **self.nyc_signs[nyc_idx],
+                    'match_status': 'matched',
+                    'match_distance': distance,
+                    'matched_detection': _build_detection_dict(self.our_detections[det_idx])
+                }
+                for nyc_idx, det_idx, distance in self.matched_pairs
+            ]
+        return self._matched_view
+
+    @property
+    def undetected(self) -> List[Dict[str, Any]]:
+        """NYC signs that we missed (materialized on demand)."""
+        if self._undetected_view is None:
+            self._undetected_view = [
+                {**self.nyc_signs[nyc_idx], 'match_status': 'undetected'}
+                for nyc_idx in self.undetected_indices
+            ]
+        return self._undetected_view
+
 
 def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """
@@ -81,6 +130,66 @@ def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> fl
     return R * c
 
 
+def _haversine_elementwise(lat1: np.ndarray, lon1: np.ndarray,
+                           lat2: np.ndarray, lon2: np.ndarray) -> np.ndarray:
+    """Elementwise haversine distance between two equal-length point arrays."""
+    R = 6371000  # Earth's radius in meters
+
+    phi1 = np.radians(lat1)
+    phi2 = np.radians(lat2)
+    delta_phi = np.radians(lat2 - lat1)
+    delta_lambda = np.radians(lon2 - lon1)
+
+    a = (np.sin(delta_phi / 2) ** 2 +
+         np.cos(phi1) * np.cos(phi2) * np.sin(delta_lambda / 2) ** 2)
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+    return R * c
+
+
+# Cached per-NYC-sign coordinate arrays keyed cheaply on id() so repeated
+# analyze_coverage calls against the same sign list (e.g. the module-level KML
+# cache in main.py) skip rebuilding arrays and recomputing N cosines per
+# request. Each entry also holds a reference to its source list: that keeps
+# the list alive for the lifetime of the entry, so a matching id is
+# guaranteed to be the same object and can never be a recycled address
+_nyc_array_cache: Dict[int, Tuple[List[Dict[str, Any]], Tuple[np.ndarray, ...]]] = {}
+
+
+def _get_nyc_arrays(nyc_signs: List[Dict[str, Any]]) -> Tuple[np.ndarray, ...]:
+    """Get (lat, lon, phi, cos_phi, lam) arrays for a NYC sign list, cached."""
+    hit = _nyc_array_cache.get(id(nyc_signs))
+    if hit is not None and hit[0] is nyc_signs:
+        return hit[1]
+
+    n = len(nyc_signs)
+    lat = np.fromiter((s['latitude'] for s in nyc_signs), np.float64, n)
+    lon = np.fromiter((s['longitude'] for s in nyc_signs), np.float64, n)
+    phi = np.radians(lat)
+    value = (lat, lon, phi, np.cos(phi), np.radians(lon))
+
+    if len(_nyc_array_cache) >= 4:
+        _nyc_array_cache.clear()
+    _nyc_array_cache[id(nyc_signs)] = (nyc_signs, value)
+    return value
+
+
+def _haversine_to_nyc(lat: float, lon: float, nyc_arrays: Tuple[np.ndarray, ...]) -> np.ndarray:
+    """Vectorized haversine against cached NYC arrays, reusing precomputed cos(phi)."""
+    R = 6371000  # Earth's radius in meters
+
+    _, _, phi2, cos_phi2, lam2 = nyc_arrays
+    phi1 = math.radians(lat)
+    delta_phi = phi2 - phi1
+    delta_lambda = lam2 - math.radians(lon)
+
+    a = (np.sin(delta_phi / 2) ** 2 +
+         math.cos(phi1) * cos_phi2 * np.sin(delta_lambda / 2) ** 2)
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+    return R * c
+
+
 def coords_to_cartesian(coords: np.ndarray) -> np.ndarray:
     """
     Convert lat/lon coordinates to 3D Cartesian coordinates for KD-Tree.
@@ -136,19 +245,25 @@ def _compute_distance_matrix(
     Returns:
         numpy array of shape (len(nyc_signs), len(detections)) with distances in meters
     """
-    n_nyc = len(nyc_signs)
+    R = 6371000  # Earth's radius in meters
+
+    _, _, nyc_phi, nyc_cos_phi, nyc_lam = _get_nyc_arrays(nyc_signs)
+
     n_det = len(detections)
-    
-    distances = np.zeros((n_nyc, n_det))
-    
-    for i, nyc in enumerate(nyc_signs):
-        for j, det in enumerate(detections):
-            distances[i, j] = haversine_distance(
-                nyc['latitude'], nyc['longitude'],
-                det['latitude'], det['longitude']
-            )
-    
-    return distances
+    det_lat = np.fromiter((d['latitude'] for d in detections), np.float64, n_det)
+    det_lon = np.fromiter((d['longitude'] for d in detections), np.float64, n_det)
+    det_phi = np.radians(det_lat)
+    det_lam = np.radians(det_lon)
+
+    # Broadcast to the full (N, M) matrix in one dense vectorized pass
+    delta_phi = nyc_phi[:, None] - det_phi[None, :]
+    delta_lambda = nyc_lam[:, None] - det_lam[None, :]
+
+    a = (np.sin(delta_phi / 2) ** 2 +
+         nyc_cos_phi[:, None] * np.cos(det_phi)[None, :] * np.sin(delta_lambda / 2) ** 2)
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+    return R * c
 
 
 def match_greedy_nearest(
@@ -167,13 +282,13 @@ def match_greedy_nearest(
     Also prevents same file_path from being used multiple times.
     
     Returns:
-        (matched_signs, undetected_signs, matched_detection_indices)
+        (matched_pairs, undetected_indices, matched_detection_indices)
     """
     # Find all potential matches using KD-Tree
     matches_per_nyc = nyc_tree.query_ball_tree(det_tree, chord_radius)
     
-    matched = []
-    undetected = []
+    matched_pairs = []
+    undetected_indices = []
     matched_detection_indices = set()
     used_file_paths = set()  # Prevent same file matching multiple signs
     
@@ -187,10 +302,7 @@ def match_greedy_nearest(
         detection_indices = matches_per_nyc[i]
         
         if not detection_indices:
-            undetected.append({
-                **nyc_sign,
-                'match_status': 'undetected'
-            })
+            undetected_indices.append(i)
             continue
         
         # Find closest UNUSED detection
@@ -217,13 +329,7 @@ def match_greedy_nearest(
                 best_idx = det_idx
         
         if best_idx is not None:
-            matched_sign = {
-                **nyc_sign,
-                'match_status': 'matched',
-                'match_distance': best_distance,
-                'matched_detection': _build_detection_dict(detections[best_idx])
-            }
-            matched.append(matched_sign)
+            matched_pairs.append((i, best_idx, best_distance))
             matched_detection_indices.add(best_idx)
             
             # Track used file_path
@@ -231,12 +337,9 @@ def match_greedy_nearest(
             if file_path:
                 used_file_paths.add(file_path)
         else:
-            undetected.append({
-                **nyc_sign,
-                'match_status': 'undetected'
-            })
+            undetected_indices.append(i)
     
-    return matched, undetected, matched_detection_indices
+    return matched_pairs, undetected_indices, matched_detection_indices
 
 
 def match_hungarian(
@@ -251,7 +354,7 @@ def match_hungarian(
     that minimizes total distance while ensuring 1:1 matching.
     
     Returns:
-        (matched_signs, undetected_signs, matched_detection_indices)
+        (matched_pairs, undetected_indices, matched_detection_indices)
     """
     if not HAS_SCIPY:
         raise RuntimeError("Hungarian algorithm requires scipy")
@@ -281,8 +384,8 @@ def match_hungarian(
     # Run Hungarian algorithm
     row_ind, col_ind = linear_sum_assignment(cost_matrix)
     
-    matched = []
-    undetected = []
+    matched_pairs = []
+    undetected_indices = []
     matched_detection_indices = set()
     used_file_paths = set()
     
@@ -309,13 +412,7 @@ def match_hungarian(
         if nyc_idx in matched_nyc_indices:
             continue
         
-        matched_sign = {
-            **nyc_signs[nyc_idx],
-            'match_status': 'matched',
-            'match_distance': distance,
-            'matched_detection': _build_detection_dict(detections[det_idx])
-        }
-        matched.append(matched_sign)
+        matched_pairs.append((nyc_idx, det_idx, distance))
         matched_detection_indices.add(det_idx)
         matched_nyc_indices.add(nyc_idx)
         
@@ -323,14 +420,11 @@ def match_hungarian(
             used_file_paths.add(file_path)
     
     # Find undetected NYC signs
-    for i, nyc_sign in enumerate(nyc_signs):
+    for i in range(len(nyc_signs)):
         if i not in matched_nyc_indices:
-            undetected.append({
-                **nyc_sign,
-                'match_status': 'undetected'
-            })
+            undetected_indices.append(i)
     
-    return matched, undetected, matched_detection_indices
+    return matched_pairs, undetected_indices, matched_detection_indices
 
 
 def match_mutual_nearest(
@@ -352,35 +446,42 @@ def match_mutual_nearest(
     This is the most conservative algorithm - only matches when both sides agree.
     
     Returns:
-        (matched_signs, undetected_signs, matched_detection_indices)
+        (matched_pairs, undetected_indices, matched_detection_indices)
     """
     chord_radius = meters_to_chord_length(radius_meters)
     
-    # For each NYC sign, find nearest detection
-    nyc_to_nearest_det = {}
-    for i, nyc_sign in enumerate(nyc_signs):
-        dist, nearest_det_idx = det_tree.query(nyc_cartesian[i])
-        actual_dist = haversine_distance(
-            nyc_sign['latitude'], nyc_sign['longitude'],
-            detections[nearest_det_idx]['latitude'], detections[nearest_det_idx]['longitude']
-        )
-        if actual_dist <= radius_meters:
-            nyc_to_nearest_det[i] = (nearest_det_idx, actual_dist)
-    
-    # For each detection, find nearest NYC sign
-    det_to_nearest_nyc = {}
-    for j, det in enumerate(detections):
-        dist, nearest_nyc_idx = nyc_tree.query(det_cartesian[j])
-        actual_dist = haversine_distance(
-            det['latitude'], det['longitude'],
-            nyc_signs[nearest_nyc_idx]['latitude'], nyc_signs[nearest_nyc_idx]['longitude']
-        )
-        if actual_dist <= radius_meters:
-            det_to_nearest_nyc[j] = (nearest_nyc_idx, actual_dist)
+    # Batch both nearest-neighbour lookups through scipy; workers=-1 fans
+    # the queries out across all CPU cores instead of looping in Python
+    _, nearest_det_for_nyc = det_tree.query(nyc_cartesian, workers=-1)
+    _, nearest_nyc_for_det = nyc_tree.query(det_cartesian, workers=-1)
+    
+    nyc_lat, nyc_lon = _get_nyc_arrays(nyc_signs)[:2]
+    n_det = len(detections)
+    det_lat = np.fromiter((d['latitude'] for d in detections), np.float64, n_det)
+    det_lon = np.fromiter((d['longitude'] for d in detections), np.float64, n_det)
+    
+    # For each NYC sign, distance to its nearest detection (and vice versa)
+    nyc_to_det_dist = _haversine_elementwise(
+        nyc_lat, nyc_lon,
+        det_lat[nearest_det_for_nyc], det_lon[nearest_det_for_nyc]
+    )
+    det_to_nyc_dist = _haversine_elementwise(
+        det_lat, det_lon,
+        nyc_lat[nearest_nyc_for_det], nyc_lon[nearest_nyc_for_det]
+    )
+    
+    nyc_to_nearest_det = {
+        int(i): (int(nearest_det_for_nyc[i]), float(nyc_to_det_dist[i]))
+        for i in np.flatnonzero(nyc_to_det_dist <= radius_meters)
+    }
+    det_to_nearest_nyc = {
+        int(j): (int(nearest_nyc_for_det[j]), float(det_to_nyc_dist[j]))
+        for j in np.flatnonzero(det_to_nyc_dist <= radius_meters)
+    }
     
     # Find mutual matches
-    matched = []
-    undetected = []
+    matched_pairs = []
+    undetected_indices = []
     matched_detection_indices = set()
     matched_nyc_indices = set()
     used_file_paths = set()
@@ -408,13 +509,7 @@ def match_mutual_nearest(
         if nyc_idx in matched_nyc_indices or det_idx in matched_detection_indices:
             continue
         
-        matched_sign = {
-            **nyc_signs[nyc_idx],
-            'match_status': 'matched',
-            'match_distance': distance,
-            'matched_detection': _build_detection_dict(detections[det_idx])
-        }
-        matched.append(matched_sign)
+        matched_pairs.append((nyc_idx, det_idx, distance))
         matched_detection_indices.add(det_idx)
         matched_nyc_indices.add(nyc_idx)
         
@@ -422,14 +517,11 @@ def match_mutual_nearest(
             used_file_paths.add(file_path)
     
     # Find undetected NYC signs
-    for i, nyc_sign in enumerate(nyc_signs):
+    for i in range(len(nyc_signs)):
         if i not in matched_nyc_indices:
-            undetected.append({
-                **nyc_sign,
-                'match_status': 'undetected'
-            })
+            undetected_indices.append(i)
     
-    return matched, undetected, matched_detection_indices
+    return matched_pairs, undetected_indices, matched_detection_indices
 
 
 def analyze_coverage(
@@ -460,7 +552,9 @@ def analyze_coverage(
     
     if not nyc_signs or not our_detections:
         return MatchResult(
-            matched=[], undetected=list(nyc_signs), new_findings=[],
+            matched_pairs=[], undetected_indices=list(range(len(nyc_signs))),
+            new_findings=[],
+            nyc_signs=list(nyc_signs), our_detections=list(our_detections),
             total_nyc=len(nyc_signs), total_detections=len(our_detections),
             match_count=0, undetected_count=len(nyc_signs),
             new_findings_count=0, coverage_percent=0,
@@ -485,33 +579,43 @@ def analyze_coverage(
     if algorithm == 'greedy_nearest':
         if not HAS_SCIPY:
             return analyze_coverage_naive(nyc_signs, our_detections, radius_meters)
-        matched, undetected, matched_det_indices = match_greedy_nearest(
+        matched_pairs, undetected_indices, matched_det_indices = match_greedy_nearest(
             nyc_signs, our_detections, radius_meters,
             nyc_tree, det_tree, chord_radius
         )
     elif algorithm == 'hungarian':
-        matched, undetected, matched_det_indices = match_hungarian(
+        matched_pairs, undetected_indices, matched_det_indices = match_hungarian(
             nyc_signs, our_detections, radius_meters
         )
     elif algorithm == 'mutual_nearest':
         if not HAS_SCIPY:
             return analyze_coverage_naive(nyc_signs, our_detections, radius_meters)
-        matched, undetected, matched_det_indices = match_mutual_nearest(
+        matched_pairs, undetected_indices, matched_det_indices = match_mutual_nearest(
             nyc_signs, our_detections, radius_meters,
             nyc_tree, det_tree, det_cartesian, nyc_cartesian
         )
     
+    # Track matched detections with a boolean mask (cheaper than set hashing
+    # per detection, and enables bulk ~mask iteration below)
+    matched_mask = np.zeros(len(our_detections), dtype=bool)
+    if matched_det_indices:
+        matched_mask[list(matched_det_indices)] = True
+
     # Find new findings: detections not matched and not within radius of any NYC sign
     new_findings = []
     if HAS_SCIPY:
         matches_per_det = det_tree.query_ball_tree(nyc_tree, chord_radius)
-        
-        for i, nyc_indices in enumerate(matches_per_det):
-            if i not in matched_det_indices and not nyc_indices:
+
+        candidate_indices = [i for i in np.flatnonzero(~matched_mask)
+                             if not matches_per_det[i]]
+        if candidate_indices:
+            # Find nearest NYC sign distances (for reference) in one batched
+            # query; workers=-1 parallelizes across all CPU cores
+            _, nearest_per_candidate = nyc_tree.query(
+                det_cartesian[candidate_indices], workers=-1
+            )
+            for i, nearest_idx in zip(candidate_indices, nearest_per_candidate):
                 detection = our_detections[i]
-                
-                # Find nearest NYC sign distance (for reference)
-                dist, nearest_idx = nyc_tree.query(det_cartesian[i])
                 nearest_meters = haversine_distance(
                     detection['latitude'], detection['longitude'],
                     nyc_signs[nearest_idx]['latitude'], nyc_signs[nearest_idx]['longitude']
@@ -532,51 +636,46 @@ def analyze_coverage(
                 }
                 new_findings.append(new_finding)
     else:
-        # Naive approach for new findings
-        for idx, detection in enumerate(our_detections):
-            if idx not in matched_det_indices:
-                is_new = True
-                min_distance = float('inf')
-                
-                for nyc_sign in nyc_signs:
-                    distance = haversine_distance(
-                        detection['latitude'], detection['longitude'],
-                        nyc_sign['latitude'], nyc_sign['longitude']
-                    )
-                    min_distance = min(min_distance, distance)
-                    if distance <= radius_meters:
-                        is_new = False
-                        break
-                
-                if is_new:
-                    new_finding = {
-                        'latitude': detection['latitude'],
-                        'longitude': detection['longitude'],
-                        'class_name': detection.get('class_name', ''),
-                        'confidence': detection.get('confidence', 0),
-                        'file_path': detection.get('file_path', ''),
-                        'bbox_x1': detection.get('bbox_x1'),
-                        'bbox_y1': detection.get('bbox_y1'),
-                        'bbox_x2': detection.get('bbox_x2'),
-                        'bbox_y2': detection.get('bbox_y2'),
-                        'match_status': 'new_finding',
-                        'nearest_nyc_distance': min_distance if min_distance != float('inf') else None
-                    }
-                    new_findings.append(new_finding)
-    
+        # Naive approach for new findings (vectorized distance to all NYC signs)
+        nyc_arrays = _get_nyc_arrays(nyc_signs)
+        for idx in np.flatnonzero(~matched_mask):
+            detection = our_detections[idx]
+            distances = _haversine_to_nyc(
+                detection['latitude'], detection['longitude'], nyc_arrays
+            )
+            min_distance = float(distances.min())
+
+            if min_distance > radius_meters:
+                new_finding = {
+                    'latitude': detection['latitude'],
+                    'longitude': detection['longitude'],
+                    'class_name': detection.get('class_name', ''),
+                    'confidence': detection.get('confidence', 0),
+                    'file_path': detection.get('file_path', ''),
+                    'bbox_x1': detection.get('bbox_x1'),
+                    'bbox_y1': detection.get('bbox_y1'),
+                    'bbox_x2': detection.get('bbox_x2'),
+                    'bbox_y2': detection.get('bbox_y2'),
+                    'match_status': 'new_finding',
+                    'nearest_nyc_distance': min_distance
+                }
+                new_findings.append(new_finding)
+
     processing_time_ms = (time.time() - start_time) * 1000
-    
+
     total_nyc = len(nyc_signs)
-    coverage_percent = (len(matched) / total_nyc * 100) if total_nyc > 0 else 0
-    
+    coverage_percent = (len(matched_pairs) / total_nyc * 100) if total_nyc > 0 else 0
+
     return MatchResult(
-        matched=matched,
-        undetected=undetected,
+        matched_pairs=matched_pairs,
+        undetected_indices=undetected_indices,
         new_findings=new_findings,
+        nyc_signs=nyc_signs,
+        our_detections=our_detections,
         total_nyc=total_nyc,
         total_detections=len(our_detections),
-        match_count=len(matched),
-        undetected_count=len(undetected),
+        match_count=len(matched_pairs),
+        undetected_count=len(undetected_indices),
         new_findings_count=len(new_findings),
         coverage_percent=coverage_percent,
         processing_time_ms=processing_time_ms,
@@ -595,15 +694,15 @@ def analyze_coverage_naive(
     """
     start_time = time.time()
     
-    matched = []
-    undetected = []
+    matched_pairs = []
+    undetected_indices = []
     new_findings = []
     
-    matched_detection_indices = set()
+    matched_mask = np.zeros(len(our_detections), dtype=bool)
     used_file_paths = set()
     
     # Sort NYC signs by number of nearby detections (approximated by iterating)
-    for nyc_sign in nyc_signs:
+    for nyc_idx, nyc_sign in enumerate(nyc_signs):
         nyc_lat = nyc_sign['latitude']
         nyc_lon = nyc_sign['longitude']
         
@@ -613,7 +712,7 @@ def analyze_coverage_naive(
         
         for idx, detection in enumerate(our_detections):
             # Skip if already used
-            if idx in matched_detection_indices:
+            if matched_mask[idx]:
                 continue
             
             # Skip if file_path already used
@@ -632,69 +731,58 @@ def analyze_coverage_naive(
                 closest_idx = idx
         
         if closest_detection:
-            matched_sign = {
-                **nyc_sign,
-                'match_status': 'matched',
-                'match_distance': closest_distance,
-                'matched_detection': _build_detection_dict(closest_detection)
-            }
-            matched.append(matched_sign)
-            matched_detection_indices.add(closest_idx)
+            matched_pairs.append((nyc_idx, closest_idx, closest_distance))
+            matched_mask[closest_idx] = True
             
             file_path = closest_detection.get('file_path', '')
             if file_path:
                 used_file_paths.add(file_path)
         else:
-            undetected_sign = {
-                **nyc_sign,
-                'match_status': 'undetected'
-            }
-            undetected.append(undetected_sign)
+            undetected_indices.append(nyc_idx)
     
-    for idx, detection in enumerate(our_detections):
-        if idx not in matched_detection_indices:
-            is_new = True
-            min_distance = float('inf')
-            
-            for nyc_sign in nyc_signs:
-                distance = haversine_distance(
-                    detection['latitude'], detection['longitude'],
-                    nyc_sign['latitude'], nyc_sign['longitude']
-                )
-                min_distance = min(min_distance, distance)
-                if distance <= radius_meters:
-                    is_new = False
-                    break
-            
-            if is_new:
-                new_finding = {
-                    'latitude': detection['latitude'],
-                    'longitude': detection['longitude'],
-                    'class_name': detection.get('class_name', ''),
-                    'confidence': detection.get('confidence', 0),
-                    'file_path': detection.get('file_path', ''),
-                    'bbox_x1': detection.get('bbox_x1'),
-                    'bbox_y1': detection.get('bbox_y1'),
-                    'bbox_x2': detection.get('bbox_x2'),
-                    'bbox_y2': detection.get('bbox_y2'),
-                    'match_status': 'new_finding',
-                    'nearest_nyc_distance': min_distance if min_distance != float('inf') else None
-                }
-                new_findings.append(new_finding)
+    nyc_arrays = _get_nyc_arrays(nyc_signs)
+
+    for idx in np.flatnonzero(~matched_mask):
+        detection = our_detections[idx]
+        if len(nyc_signs) > 0:
+            distances = _haversine_to_nyc(
+                detection['latitude'], detection['longitude'], nyc_arrays
+            )
+            min_distance = float(distances.min())
+        else:
+            min_distance = None
+
+        if min_distance is None or min_distance > radius_meters:
+            new_finding = {
+                'latitude': detection['latitude'],
+                'longitude': detection['longitude'],
+                'class_name': detection.get('class_name', ''),
+                'confidence': detection.get('confidence', 0),
+                'file_path': detection.get('file_path', ''),
+                'bbox_x1': detection.get('bbox_x1'),
+                'bbox_y1': detection.get('bbox_y1'),
+                'bbox_x2': detection.get('bbox_x2'),
+                'bbox_y2': detection.get('bbox_y2'),
+                'match_status': 'new_finding',
+                'nearest_nyc_distance': min_distance
+            }
+            new_findings.append(new_finding)
     
     processing_time_ms = (time.time() - start_time) * 1000
     
     total_nyc = len(nyc_signs)
-    coverage_percent = (len(matched) / total_nyc * 100) if total_nyc > 0 else 0
+    coverage_percent = (len(matched_pairs) / total_nyc * 100) if total_nyc > 0 else 0
     
     return MatchResult(
-        matched=matched,
-        undetected=undetected,
+        matched_pairs=matched_pairs,
+        undetected_indices=undetected_indices,
         new_findings=new_findings,
+        nyc_signs=nyc_signs,
+        our_detections=our_detections,
         total_nyc=total_nyc,
         total_detections=len(our_detections),
-        match_count=len(matched),
-        undetected_count=len(undetected),
+        match_count=len(matched_pairs),
+        undetected_count=len(undetected_indices),
         new_findings_count=len(new_findings),
         coverage_percent=coverage_percent,
         processing_time_ms=processing_time_ms,
@@ -850,9 +938,13 @@ def result_to_geojson(result: MatchResult) -> Dict[str, Any]:
     """Convert MatchResult to GeoJSON FeatureCollection with all points."""
     features = []
     
-    # Add matched signs (blue)
-    for sign in result.matched:
-        matched_det = sign.get('matched_detection', {})
+    # Add matched signs (blue) - walk the index pairs and read the original
+    # sign/detection dicts directly, without materializing copies
+    nyc_signs = result.nyc_signs
+    detections = result.our_detections
+    for nyc_idx, det_idx, distance in result.matched_pairs:
+        sign = nyc_signs[nyc_idx]
+        matched_det = detections[det_idx]
         feature = {
             'type': 'Feature',
             'geometry': {
@@ -861,10 +953,10 @@ def result_to_geojson(result: MatchResult) -> Dict[str, Any]:
             },
             'properties': {
                 'id': sign.get('id', ''),
-                'status': 'matched',
+                'status': _STATUS_MATCHED,
                 'sign_type': sign.get('sign_type', ''),
                 'description': sign.get('description', ''),
-                'match_distance': sign.get('match_distance', 0),
+                'match_distance': distance,
                 'class_name': matched_det.get('class_name', ''),
                 'confidence': matched_det.get('confidence', 0),
                 'file_path': matched_det.get('file_path', ''),
@@ -874,13 +966,14 @@ def result_to_geojson(result: MatchResult) -> Dict[str, Any]:
                 'bbox_y1': matched_det.get('bbox_y1'),
                 'bbox_x2': matched_det.get('bbox_x2'),
                 'bbox_y2': matched_det.get('bbox_y2'),
-                'color': COLORS['matched']
+                'color': _COLOR_MATCHED
             }
         }
         features.append(feature)
     
     # Add undetected signs (red)
-    for sign in result.undetected:
+    for nyc_idx in result.undetected_indices:
+        sign = nyc_signs[nyc_idx]
         feature = {
             'type': 'Feature',
             'geometry': {
@@ -889,10 +982,10 @@ def result_to_geojson(result: MatchResult) -> Dict[str, Any]:
             },
             'properties': {
                 'id': sign.get('id', ''),
-                'status': 'undetected',
+                'status': _STATUS_UNDETECTED,
                 'sign_type': sign.get('sign_type', ''),
                 'description': sign.get('description', ''),
-                'color': COLORS['undetected']
+                'color': _COLOR_UNDETECTED
             }
         }
         features.append(feature)
@@ -906,7 +999,7 @@ def result_to_geojson(result: MatchResult) -> Dict[str, Any]:
                 'coordinates': [det['longitude'], det['latitude']]
             },
             'properties': {
-                'status': 'new_finding',
+                'status': _STATUS_NEW_FINDING,
                 'class_name': det.get('class_name', ''),
                 'confidence': det.get('confidence', 0),
                 'nearest_nyc_distance': det.get('nearest_nyc_distance'),
@@ -915,7 +1008,7 @@ def result_to_geojson(result: MatchResult) -> Dict[str, Any]:
                 'bbox_y1': det.get('bbox_y1'),
                 'bbox_x2': det.get('bbox_x2'),
                 'bbox_y2': det.get('bbox_y2'),
-                'color': COLORS['new_finding']
+                'color': _COLOR_NEW_FINDING
             }
         }
         features.append(feature)
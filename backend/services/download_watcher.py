@@ -15,12 +15,21 @@ import time
 import logging
 import threading
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional, Callable
-from glob import glob
 
 logger = logging.getLogger(__name__)
 
+# Optional event-driven watching (falls back to polling if unavailable)
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+    HAS_WATCHDOG = True
+except ImportError:
+    HAS_WATCHDOG = False
+    print("Warning: watchdog not installed. Download watcher will poll. Install with: pip install watchdog")
+
 # Status file directory (files have date prefix: YYYYMMDD_download_status.json)
 STATUS_DIR = '/home/daree/03-Work-sh/NYC/img_download/download_status'
 
@@ -31,6 +40,45 @@ SCAN_DELAY_SECONDS = 60
 CHECK_INTERVAL_SECONDS = 30
 
 
+@lru_cache(maxsize=16)
+def _parse_end_time(value: str) -> datetime:
+    """
+    Parse an end_time of the form 'YYYY-MM-DD HH:MM:SS' by direct slicing.
+    
+    Cached: the same end times are re-checked every cycle until a new
+    download completes, so repeat parses cost one dict lookup.
+    """
+    return datetime(
+        int(value[0:4]), int(value[5:7]), int(value[8:10]),
+        int(value[11:13]), int(value[14:16]), int(value[17:19])
+    )
+
+
+if HAS_WATCHDOG:
+    class _StatusFileEventHandler(FileSystemEventHandler):
+        """Wakes the watch loop when a status JSON file is written or moved in."""
+        
+        def __init__(self, wake_event: threading.Event):
+            self._wake_event = wake_event
+        
+        @staticmethod
+        def _is_status_file(path: str) -> bool:
+            name = os.path.basename(path)
+            return '_download_status' in name and name.endswith('.json')
+        
+        def on_created(self, event):
+            if not event.is_directory and self._is_status_file(event.src_path):
+                self._wake_event.set()
+        
+        def on_modified(self, event):
+            if not event.is_directory and self._is_status_file(event.src_path):
+                self._wake_event.set()
+        
+        def on_moved(self, event):
+            if not event.is_directory and self._is_status_file(event.dest_path):
+                self._wake_event.set()
+
+
 class DownloadWatcher:
     """Watches download status files and triggers scan when complete."""
     
@@ -50,6 +98,51 @@ class DownloadWatcher:
             'thumbnails': None
         }
         self._scan_triggered_for: Optional[str] = None  # Track which completion we triggered for
+        self._wake_event = threading.Event()  # Set by filesystem events (watchdog)
+        self._stop_event = threading.Event()  # Set by stop() to interrupt waits
+        # Parsed status files keyed by path -> (st_mtime_ns, st_size, parsed dict)
+        self._status_cache: dict[str, tuple[int, int, dict]] = {}
+        # Latest status snapshot published by the watch loop for get_status()
+        self._last_snapshot: Optional[dict] = None
+        self._snapshot_lock = threading.Lock()
+        self._observer = None  # watchdog Observer when event-driven mode is active
+    
+    def _find_latest_status_files(self) -> dict:
+        """
+        Find the latest status file for both types in one directory sweep.
+        
+        Returns:
+            {'images': path or None, 'thumbnails': path or None}
+        """
+        # Single scandir pass tracking the max mtime per bucket; DirEntry.stat()
+        # reuses the data from the directory read instead of a stat per file
+        images_path, images_mtime = None, -1
+        thumbs_path, thumbs_mtime = None, -1
+        try:
+            with os.scandir(STATUS_DIR) as entries:
+                for entry in entries:
+                    name = entry.name
+                    # Check the thumbnails suffix first: it also ends with the
+                    # images suffix, so order matters
+                    if name.endswith('_download_status_thumbnails.json'):
+                        is_thumbnail = True
+                    elif name.endswith('_download_status.json'):
+                        is_thumbnail = False
+                    else:
+                        continue
+                    try:
+                        mtime = entry.stat().st_mtime_ns
+                    except OSError:
+                        continue
+                    if is_thumbnail:
+                        if mtime > thumbs_mtime:
+                            thumbs_mtime, thumbs_path = mtime, entry.path
+                    elif mtime > images_mtime:
+                        images_mtime, images_path = mtime, entry.path
+        except FileNotFoundError:
+            pass
+        
+        return {'images': images_path, 'thumbnails': thumbs_path}
     
     def _find_latest_status_file(self, file_type: str) -> Optional[str]:
         """
@@ -61,44 +154,50 @@ class DownloadWatcher:
         Returns:
             Path to the latest status file, or None if not found
         """
-        if file_type == 'images':
-            pattern = os.path.join(STATUS_DIR, '*_download_status.json')
-        elif file_type == 'thumbnails':
-            pattern = os.path.join(STATUS_DIR, '*_download_status_thumbnails.json')
-        else:
-            return None
+        return self._find_latest_status_files().get(file_type)
         
-        # Find all matching files
-        files = glob(pattern)
+    def _read_status_file(self, path: str) -> Optional[dict]:
+        """Read and parse a status JSON file.
         
-        if not files:
+        The parsed dict is cached against the file's (mtime_ns, size) so the
+        steady state costs one os.stat per check instead of re-reading and
+        re-parsing unchanged JSON every cycle.
+        """
+        try:
+            st = os.stat(path)
+        except OSError:
             return None
         
-        # Sort by modification time (most recent first)
-        files.sort(key=os.path.getmtime, reverse=True)
+        cached = self._status_cache.get(path)
+        if cached is not None and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            return cached[2]
         
-        return files[0]
-        
-    def _read_status_file(self, path: str) -> Optional[dict]:
-        """Read and parse a status JSON file."""
         try:
-            if not os.path.exists(path):
-                return None
-            
             with open(path, 'r') as f:
-                return json.load(f)
+                parsed = json.load(f)
         except (json.JSONDecodeError, IOError) as e:
-            logger.warning(f"Error reading status file {path}: {e}")
+            logger.warning("Error reading status file %s: %s", path, e)
             return None
+        
+        if len(self._status_cache) >= 16:
+            self._status_cache.clear()
+        self._status_cache[path] = (st.st_mtime_ns, st.st_size, parsed)
+        return parsed
     
-    def _get_status(self, name: str) -> tuple[bool, Optional[str], Optional[str]]:
+    def _get_status(self, name: str, file_path: Optional[str] = None) -> tuple[bool, Optional[str], Optional[str]]:
         """
         Check if a download is complete.
         
+        Args:
+            name: Either 'images' or 'thumbnails'
+            file_path: Pre-resolved status file path (from
+                _find_latest_status_files); looked up here when omitted
+        
         Returns:
             Tuple of (is_completed, end_time, file_path)
         """
-        file_path = self._find_latest_status_file(name)
+        if file_path is None:
+            file_path = self._find_latest_status_file(name)
         if not file_path:
             return False, None, None
             
@@ -113,9 +212,27 @@ class DownloadWatcher:
     
     def _check_and_trigger(self):
         """Check status files and trigger scan if both downloads are complete."""
-        # Check both status files
-        images_complete, images_end_time, images_path = self._get_status('images')
-        thumbnails_complete, thumbnails_end_time, thumbnails_path = self._get_status('thumbnails')
+        # Check both status files with a single directory sweep
+        latest = self._find_latest_status_files()
+        images_complete, images_end_time, images_path = self._get_status('images', latest['images'])
+        thumbnails_complete, thumbnails_end_time, thumbnails_path = self._get_status('thumbnails', latest['thumbnails'])
+        
+        # Publish a snapshot so external get_status() calls read it instead
+        # of redoing the directory sweep and JSON reads
+        snapshot = {
+            'images': {
+                'path': images_path,
+                'completed': images_complete,
+                'end_time': images_end_time
+            },
+            'thumbnails': {
+                'path': thumbnails_path,
+                'completed': thumbnails_complete,
+                'end_time': thumbnails_end_time
+            }
+        }
+        with self._snapshot_lock:
+            self._last_snapshot = snapshot
         
         if not images_complete or not thumbnails_complete:
             # Not both complete yet
@@ -130,9 +247,9 @@ class DownloadWatcher:
         
         # Check if the end times are recent (within last hour)
         try:
-            # Parse end times
-            images_dt = datetime.strptime(images_end_time, "%Y-%m-%d %H:%M:%S")
-            thumbnails_dt = datetime.strptime(thumbnails_end_time, "%Y-%m-%d %H:%M:%S")
+            # Parse end times (cached slicing parser)
+            images_dt = _parse_end_time(images_end_time)
+            thumbnails_dt = _parse_end_time(thumbnails_end_time)
             
             # Get the later of the two
             latest_completion = max(images_dt, thumbnails_dt)
@@ -142,20 +259,25 @@ class DownloadWatcher:
             time_since_completion = (now - latest_completion).total_seconds()
             
             if time_since_completion > 3600:  # More than 1 hour ago
-                logger.debug(f"Downloads completed too long ago ({time_since_completion:.0f}s), skipping")
+                logger.debug("Downloads completed too long ago (%.0fs), skipping", time_since_completion)
                 self._scan_triggered_for = completion_key
                 return
                 
         except (ValueError, TypeError) as e:
-            logger.warning(f"Error parsing end times: {e}")
+            logger.warning("Error parsing end times: %s", e)
             return
         
         # New completion detected!
-        logger.info(f"Downloads completed! Images: {images_end_time} ({images_path}), Thumbnails: {thumbnails_end_time} ({thumbnails_path})")
-        logger.info(f"Waiting {SCAN_DELAY_SECONDS} seconds before triggering scan...")
+        logger.info(
+            "Downloads completed! Images: %s (%s), Thumbnails: %s (%s)",
+            images_end_time, images_path, thumbnails_end_time, thumbnails_path
+        )
+        logger.info("Waiting %s seconds before triggering scan...", SCAN_DELAY_SECONDS)
         
-        # Wait before triggering
-        time.sleep(SCAN_DELAY_SECONDS)
+        # Wait before triggering; returns early if stop() is called
+        if self._stop_event.wait(SCAN_DELAY_SECONDS):
+            logger.info("Shutdown requested during scan delay, skipping trigger")
+            return
         
         # Mark as triggered
         self._scan_triggered_for = completion_key
@@ -166,26 +288,32 @@ class DownloadWatcher:
                 logger.info("Triggering scan after download completion...")
                 self.on_download_complete()
             except Exception as e:
-                logger.error(f"Error in download complete callback: {e}")
+                logger.error("Error in download complete callback: %s", e)
         else:
             logger.warning("No callback registered for download completion")
     
     def _watch_loop(self):
         """Main watch loop."""
-        logger.info(f"Download watcher started. Checking every {CHECK_INTERVAL_SECONDS}s")
-        logger.info(f"Watching directory: {STATUS_DIR}")
+        logger.info("Download watcher started. Checking every %ss", CHECK_INTERVAL_SECONDS)
+        logger.info("Watching directory: %s", STATUS_DIR)
         
         while self._running:
             try:
                 self._check_and_trigger()
             except Exception as e:
-                logger.error(f"Error in watch loop: {e}")
+                logger.error("Error in watch loop: %s", e)
             
-            # Wait before next check
-            for _ in range(CHECK_INTERVAL_SECONDS):
-                if not self._running:
+            if self._observer is not None:
+                # Event-driven: block until a status file actually changes
+                # (with a long safety-net timeout), instead of waking every
+                # cycle to stat the directory
+                self._wake_event.wait(CHECK_INTERVAL_SECONDS * 10)
+                self._wake_event.clear()
+            else:
+                # Polling fallback: a single interruptible wait instead of
+                # thirty 1-second sleeps; returns immediately on stop()
+                if self._stop_event.wait(CHECK_INTERVAL_SECONDS):
                     break
-                time.sleep(1)
         
         logger.info("Download watcher stopped")
     
@@ -196,6 +324,24 @@ class DownloadWatcher:
             return
         
         self._running = True
+        self._stop_event.clear()
+        
+        # Prefer kernel-level file notifications over polling when available
+        if HAS_WATCHDOG and os.path.isdir(STATUS_DIR):
+            try:
+                self._observer = Observer()
+                self._observer.schedule(
+                    _StatusFileEventHandler(self._wake_event),
+                    STATUS_DIR,
+                    recursive=False
+                )
+                self._observer.daemon = True
+                self._observer.start()
+                logger.info("Download watcher using filesystem events (watchdog)")
+            except Exception as e:
+                logger.warning("Could not start filesystem observer, falling back to polling: %s", e)
+                self._observer = None
+        
         self._thread = threading.Thread(target=self._watch_loop, daemon=True)
         self._thread.start()
         logger.info("Download watcher thread started")
@@ -203,28 +349,49 @@ class DownloadWatcher:
     def stop(self):
         """Stop the watcher."""
         self._running = False
+        self._stop_event.set()
+        self._wake_event.set()  # Wake the loop immediately
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout=5)
+            self._observer = None
         if self._thread:
             self._thread.join(timeout=5)
             self._thread = None
         logger.info("Download watcher stopped")
     
     def get_status(self) -> dict:
-        """Get current watcher status."""
-        images_complete, images_end_time, images_path = self._get_status('images')
-        thumbnails_complete, thumbnails_end_time, thumbnails_path = self._get_status('thumbnails')
+        """
+        Get current watcher status.
+        
+        Served from the snapshot published by the watch loop when available,
+        so external polling (e.g. an HTTP endpoint) costs no filesystem I/O.
+        """
+        with self._snapshot_lock:
+            snapshot = self._last_snapshot
+        
+        if snapshot is None:
+            # First call before the watch loop has run: do the lookup directly
+            latest = self._find_latest_status_files()
+            images_complete, images_end_time, images_path = self._get_status('images', latest['images'])
+            thumbnails_complete, thumbnails_end_time, thumbnails_path = self._get_status('thumbnails', latest['thumbnails'])
+            snapshot = {
+                'images': {
+                    'path': images_path,
+                    'completed': images_complete,
+                    'end_time': images_end_time
+                },
+                'thumbnails': {
+                    'path': thumbnails_path,
+                    'completed': thumbnails_complete,
+                    'end_time': thumbnails_end_time
+                }
+            }
         
         return {
             'is_running': self._running,
-            'images': {
-                'path': images_path,
-                'completed': images_complete,
-                'end_time': images_end_time
-            },
-            'thumbnails': {
-                'path': thumbnails_path,
-                'completed': thumbnails_complete,
-                'end_time': thumbnails_end_time
-            },
+            'images': snapshot['images'],
+            'thumbnails': snapshot['thumbnails'],
             'last_triggered_for': self._scan_triggered_for,
             'check_interval_seconds': CHECK_INTERVAL_SECONDS,
             'scan_delay_seconds': SCAN_DELAY_SECONDS
@@ -2,11 +2,52 @@
 KML Parser Service
 Parses NYC Speed Limit Sign KML files to extract sign locations.
 """
+import functools
+import json
+from concurrent.futures import ProcessPoolExecutor
 import re
 import xml.etree.ElementTree as ET
-from typing import List, Dict, Any, Optional
+from collections import Counter
+from typing import List, Dict, Any, Optional, Tuple, Iterator
+import numpy as np
 from pathlib import Path
 
+# Optional lxml for faster C-level parsing and streaming (stdlib fallback below)
+try:
+    from lxml import etree as lxml_etree
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+    print("Warning: lxml not installed. Using stdlib XML parser. Install with: pip install lxml")
+
+# Optional orjson for fast C-level JSON serialization (stdlib json fallback)
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# KML namespace-qualified tag constants, so the per-placemark hot path can
+# compare child tags directly instead of compiling an XPath per find() call
+_KML_NS = 'http://www.opengis.net/kml/2.2'
+_NAME_TAG = f'{{{_KML_NS}}}name'
+_DESC_TAG = f'{{{_KML_NS}}}description'
+_COORD_TAG = f'{{{_KML_NS}}}coordinates'
+
+# Precompiled patterns: these run once per placemark, so skip the per-call
+# re-cache lookup and flag parsing
+# Above this many placemarks the regex-heavy finalization is farmed out to a
+# process pool; below it the pool overhead outweighs the gain
+_PARALLEL_THRESHOLD = 10_000
+
+_SIGN_CODE_RE = re.compile(r'^(SR-\d+|SW-\d+|SI-\d+[A-Z]?):')
+_SPEED_LIMIT_RE = re.compile(r'SPEED LIMIT\s*(\d+)', re.IGNORECASE)
+_SPEED_LIMIT_KW_RE = re.compile(r'SPEED LIMIT', re.IGNORECASE)
+_SCHOOL_RE = re.compile(r'SCHOOL', re.IGNORECASE)
+_END_SCHOOL_RE = re.compile(r'END SCHOOL', re.IGNORECASE)
+_SLOW_ZONE_RE = re.compile(r'NEIGHBORHOOD SLOW ZONE', re.IGNORECASE)
+_PHOTO_RE = re.compile(r'PHOTO ENFORCED', re.IGNORECASE)
+
 
 def parse_nyc_speed_signs(kml_path: str) -> List[Dict[str, Any]]:
     """
@@ -34,45 +75,109 @@ def parse_nyc_speed_signs(kml_path: str) -> List[Dict[str, Any]]:
         - longitude: Longitude coordinate
         - latitude: Latitude coordinate
     """
+    return _build_signs(_collect_raw(kml_path))
+
+
+def parse_nyc_speed_signs_soa(kml_path: str) -> Dict[str, Any]:
+    """
+    Parse NYC Speed Limit Signs KML into column-oriented (SoA) form.
+    
+    Returns a dict of parallel columns instead of one dict per sign:
+    - id, sign_code, description, sign_type: lists of str
+    - speed_limit: int32 ndarray (0 = unknown)
+    - longitude, latitude: float64 ndarrays
+    
+    One object header per column instead of per row, and coordinates stay
+    in numpy form for vectorized consumers.
+    """
+    return _build_signs_soa(_collect_raw(kml_path))
+
+
+def _iter_raw(kml_path: str) -> Iterator[Tuple[str, str, str]]:
+    """Yield raw (id, description, coordinates) strings from a KML file."""
     if not Path(kml_path).exists():
         raise FileNotFoundError(f"KML file not found: {kml_path}")
     
-    # Parse the KML file
-    tree = ET.parse(kml_path)
-    root = tree.getroot()
-    
     # Handle KML namespace
     namespaces = {
         'kml': 'http://www.opengis.net/kml/2.2',
         'gx': 'http://www.google.com/kml/ext/2.2'
     }
     
-    signs = []
+    placemark_tag = f'{{{_KML_NS}}}Placemark'
     
-    # Find all Placemark elements
-    for placemark in root.findall('.//kml:Placemark', namespaces):
-        sign = _parse_placemark(placemark, namespaces)
-        if sign:
-            signs.append(sign)
+    if HAS_LXML:
+        # Stream Placemarks with iterparse instead of building the full
+        # document tree; clear processed elements to keep memory flat
+        yielded = False
+        for _, placemark in lxml_etree.iterparse(kml_path, tag=placemark_tag, events=('end',)):
+            item = _extract_placemark_raw(placemark, namespaces)
+            if item:
+                yielded = True
+                yield item
+            placemark.clear()
+            while placemark.getprevious() is not None:
+                del placemark.getparent()[0]
+        
+        if yielded:
+            return
+        # Fall through to the stdlib parse below for namespace-less KML
     
-    # If no signs found with namespace, try without namespace
-    if not signs:
-        for placemark in root.findall('.//Placemark'):
-            sign = _parse_placemark(placemark, None)
-            if sign:
-                signs.append(sign)
+    # Stdlib fallback: iterparse still streams the document, and clearing
+    # each Placemark after processing keeps peak memory well below ET.parse
+    for _, elem in ET.iterparse(kml_path, events=('end',)):
+        tag = elem.tag
+        if tag == placemark_tag:
+            item = _extract_placemark_raw(elem, namespaces)
+        elif tag == 'Placemark':
+            item = _extract_placemark_raw(elem, None)
+        else:
+            continue
+        if item:
+            yield item
+        elem.clear()
+
+
+def _collect_raw(kml_path: str) -> List[Tuple[str, str, str]]:
+    """Collect raw (id, description, coordinates) strings from a KML file."""
+    return list(_iter_raw(kml_path))
+
+
+def iter_nyc_speed_signs(kml_path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Stream parsed signs one at a time with constant memory.
     
-    return signs
+    Same per-sign dicts as parse_nyc_speed_signs, but the full list is never
+    materialized, so this pairs with stream_geojson_to for KMLs of any size.
+    """
+    for item in _iter_raw(kml_path):
+        sign = _finalize_sign(item)
+        if sign:
+            yield sign
 
 
-def _parse_placemark(placemark: ET.Element, namespaces: Optional[Dict]) -> Optional[Dict[str, Any]]:
-    """Parse a single Placemark element."""
+def _extract_placemark_raw(placemark: ET.Element, namespaces: Optional[Dict]) -> Optional[Tuple[str, str, str]]:
+    """Extract (sign_id, description, coords_text) strings from a Placemark."""
     try:
         # Get name (sign ID)
+        name_elem = None
+        desc_elem = None
+        coord_elem = None
+        
         if namespaces:
-            name_elem = placemark.find('kml:name', namespaces)
-            desc_elem = placemark.find('kml:description', namespaces)
-            coord_elem = placemark.find('.//kml:coordinates', namespaces)
+            # Dispatch on qualified child tags directly; coordinates live
+            # under the geometry child (e.g. Point)
+            for child in placemark:
+                tag = child.tag
+                if tag == _NAME_TAG:
+                    name_elem = child
+                elif tag == _DESC_TAG:
+                    desc_elem = child
+                elif coord_elem is None:
+                    for sub in child:
+                        if sub.tag == _COORD_TAG:
+                            coord_elem = sub
+                            break
         else:
             name_elem = placemark.find('name')
             desc_elem = placemark.find('description')
@@ -83,73 +188,268 @@ def _parse_placemark(placemark: ET.Element, namespaces: Optional[Dict]) -> Optio
         
         sign_id = name_elem.text.strip() if name_elem.text else ""
         description = desc_elem.text.strip() if desc_elem is not None and desc_elem.text else ""
-        
-        # Parse coordinates (lon,lat,alt)
         coords_text = coord_elem.text.strip() if coord_elem.text else ""
-        coords = coords_text.split(',')
-        
-        if len(coords) < 2:
-            return None
         
-        longitude = float(coords[0])
-        latitude = float(coords[1])
+        return sign_id, description, coords_text
         
-        # Parse sign code and type from description
-        sign_code = _extract_sign_code(description)
-        sign_type = _classify_sign_type(description)
-        speed_limit = _extract_speed_limit(description)
+    except AttributeError:
+        return None
+
+
+def _parse_coordinates_batch(coord_texts: List[str]) -> np.ndarray:
+    """
+    Parse 'lon,lat[,alt]' strings into an (n, 2) float64 array.
+    
+    The float conversion happens in one C loop inside np.array instead of
+    2N Python-level float() calls. Malformed rows become NaN.
+    """
+    try:
+        return np.array([t.split(',')[:2] for t in coord_texts], dtype=np.float64)
+    except ValueError:
+        # Rare malformed rows: per-row fallback marking bad entries as NaN
+        coords = np.full((len(coord_texts), 2), np.nan)
+        for i, text in enumerate(coord_texts):
+            parts = text.split(',')
+            try:
+                coords[i, 0] = float(parts[0])
+                coords[i, 1] = float(parts[1])
+            except (ValueError, IndexError):
+                pass
+        return coords
+
+
+def _build_signs_soa(raw: List[Tuple[str, str, str]]) -> Dict[str, Any]:
+    """Build a column-oriented sign table from raw placemark strings."""
+    if raw:
+        coords = _parse_coordinates_batch([item[2] for item in raw])
+        valid = ~np.isnan(coords).any(axis=1)
+    else:
+        coords = np.empty((0, 2))
+        valid = np.empty(0, dtype=bool)
+    
+    ids = []
+    codes = []
+    descriptions = []
+    types = []
+    speeds = []
+    keep = []
+    
+    for i, (sign_id, description, _) in enumerate(raw):
+        if not valid[i]:
+            continue
+        keep.append(i)
+        ids.append(sign_id)
+        codes.append(_extract_sign_code(description))
+        descriptions.append(description)
+        types.append(_classify_sign_type(description))
+        speed = _extract_speed_limit(description)
+        speeds.append(speed if speed is not None else 0)
+    
+    coords = coords[keep] if keep else coords[:0]
+    
+    return {
+        'id': ids,
+        'sign_code': codes,
+        'description': descriptions,
+        'sign_type': types,
+        'speed_limit': np.asarray(speeds, dtype=np.int32),
+        'longitude': coords[:, 0].copy(),
+        'latitude': coords[:, 1].copy()
+    }
+
+
+def _scan_sign_code(description: str) -> str:
+    """Regex-free scan for a leading 'SR-123:' / 'SW-123:' / 'SI-123A:' code."""
+    if description[:3] not in ('SR-', 'SW-', 'SI-'):
+        return ''
+    
+    i = 3
+    n = len(description)
+    while i < n and description[i].isdigit():
+        i += 1
+    if i == 3:
+        return ''
+    
+    if description.startswith('SI') and i < n and 'A' <= description[i] <= 'Z':
+        i += 1
+    
+    if i < n and description[i] == ':':
+        return description[:i]
+    return ''
+
+
+def _scan_speed_limit(desc_upper: str) -> Optional[int]:
+    """Digit-scan for the value after 'SPEED LIMIT' in uppercased text.
+
+    Keeps searching past occurrences with no trailing number, matching
+    _SPEED_LIMIT_RE.search: 'SCHOOL SPEED LIMIT' followed later by
+    'SPEED LIMIT 20' must still yield 20.
+    """
+    n = len(desc_upper)
+    pos = desc_upper.find('SPEED LIMIT')
+    while pos != -1:
+        i = pos + 11
+        while i < n and desc_upper[i].isspace():
+            i += 1
+        start = i
+        while i < n and desc_upper[i].isdigit():
+            i += 1
+
+        if i > start:
+            return int(desc_upper[start:i])
+        pos = desc_upper.find('SPEED LIMIT', pos + 1)
+    return None
+
+
+def _finalize_raw(name: str, desc: str, coord: str) -> Optional[Tuple]:
+    """
+    Regex-free finalization of one raw placemark.
+    
+    Pure string scans and float conversions only - no regex engine - so the
+    hot inner loop stays cheap on the largest KMLs (and the function would
+    compile cleanly should a native build ever be added).
+    
+    Returns:
+        (id, sign_code, description, sign_type, speed_limit, lon, lat)
+        or None for malformed coordinates
+    """
+    comma = coord.find(',')
+    if comma <= 0:
+        return None
+    second = coord.find(',', comma + 1)
+    if second == -1:
+        second = len(coord)
+    try:
+        longitude = float(coord[:comma])
+        latitude = float(coord[comma + 1:second])
+    except ValueError:
+        return None
+    
+    desc_upper = desc.upper()
+    speed_limit = _scan_speed_limit(desc_upper)
+    
+    # Same branch order as _classify_sign_type
+    if 'SCHOOL' in desc_upper:
+        sign_type = 'school_zone_end' if 'END SCHOOL' in desc_upper else 'school_zone'
+    elif 'NEIGHBORHOOD SLOW ZONE' in desc_upper:
+        sign_type = 'slow_zone'
+    elif 'PHOTO ENFORCED' in desc_upper:
+        sign_type = 'photo_enforced'
+    elif speed_limit is not None:
+        sign_type = f'speed_{speed_limit}'
+    elif 'SPEED LIMIT' in desc_upper:
+        sign_type = 'speed_limit'
+    else:
+        sign_type = 'other'
+    
+    return name, _scan_sign_code(desc), desc, sign_type, speed_limit, longitude, latitude
+
+
+def _finalize_sign(item: Tuple[str, str, str]) -> Optional[Dict[str, Any]]:
+    """Finalize one raw (id, description, coords) tuple into a sign dict.
+    
+    Self-contained so it can run in worker processes.
+    """
+    result = _finalize_raw(*item)
+    if result is None:
+        return None
+    
+    sign_id, sign_code, description, sign_type, speed_limit, longitude, latitude = result
+    return {
+        'id': sign_id,
+        'sign_code': sign_code,
+        'description': description,
+        'sign_type': sign_type,
+        'speed_limit': speed_limit,
+        'longitude': longitude,
+        'latitude': latitude
+    }
+
+
+def _build_signs(raw: List[Tuple[str, str, str]]) -> List[Dict[str, Any]]:
+    """Build sign dicts from raw placemark strings with batched coordinates."""
+    if not raw:
+        return []
+    
+    # For very large KMLs the per-sign scan-and-classify work dominates;
+    # it is pure-Python string processing, so threads would serialize on
+    # the GIL and only processes actually parallelize it
+    if len(raw) > _PARALLEL_THRESHOLD:
+        try:
+            with ProcessPoolExecutor() as executor:
+                return [
+                    sign for sign in executor.map(_finalize_sign, raw, chunksize=1024)
+                    if sign is not None
+                ]
+        except (OSError, ValueError) as e:
+            print(f"Warning: process pool unavailable ({e}), parsing in-process")
+    
+    coords = _parse_coordinates_batch([item[2] for item in raw])
+    valid = ~np.isnan(coords).any(axis=1)
+    
+    signs = []
+    for i, (sign_id, description, _) in enumerate(raw):
+        if not valid[i]:
+            continue
         
-        return {
+        signs.append({
             'id': sign_id,
-            'sign_code': sign_code,
+            'sign_code': _extract_sign_code(description),
             'description': description,
-            'sign_type': sign_type,
-            'speed_limit': speed_limit,
-            'longitude': longitude,
-            'latitude': latitude
-        }
-        
-    except (ValueError, AttributeError) as e:
-        return None
+            'sign_type': _classify_sign_type(description),
+            'speed_limit': _extract_speed_limit(description),
+            'longitude': float(coords[i, 0]),
+            'latitude': float(coords[i, 1])
+        })
+    
+    return signs
 
 
+@functools.lru_cache(maxsize=4096)
 def _extract_sign_code(description: str) -> str:
     """Extract sign regulation code (e.g., SR-2191) from description."""
-    match = re.match(r'^(SR-\d+|SW-\d+|SI-\d+[A-Z]?):', description)
+    match = _SIGN_CODE_RE.match(description)
     return match.group(1) if match else ""
 
 
+@functools.lru_cache(maxsize=4096)
 def _extract_speed_limit(description: str) -> Optional[int]:
     """Extract speed limit value from description."""
     # Match patterns like "SPEED LIMIT 25", "SPEED LIMIT 20", etc.
-    match = re.search(r'SPEED LIMIT\s*(\d+)', description, re.IGNORECASE)
+    match = _SPEED_LIMIT_RE.search(description)
     if match:
         return int(match.group(1))
     return None
 
 
+@functools.lru_cache(maxsize=4096)
 def _classify_sign_type(description: str) -> str:
-    """Classify the sign type based on description."""
-    desc_upper = description.upper()
+    """Classify the sign type based on description.
     
-    if 'SCHOOL' in desc_upper:
-        if 'END SCHOOL' in desc_upper:
+    Memoized: the dataset has hundreds of thousands of signs but only dozens
+    of distinct description templates, so repeats skip the regex scans.
+    """
+    # Case-insensitive searches on the original string avoid allocating an
+    # uppercased copy of every description
+    if _SCHOOL_RE.search(description):
+        if _END_SCHOOL_RE.search(description):
             return 'school_zone_end'
         return 'school_zone'
-    elif 'NEIGHBORHOOD SLOW ZONE' in desc_upper:
+    elif _SLOW_ZONE_RE.search(description):
         return 'slow_zone'
-    elif 'PHOTO ENFORCED' in desc_upper:
+    elif _PHOTO_RE.search(description):
         return 'photo_enforced'
-    elif 'SPEED LIMIT' in desc_upper:
-        # Try to get the speed value
-        match = re.search(r'SPEED LIMIT\s*(\d+)', desc_upper)
-        if match:
-            return f"speed_{match.group(1)}"
+    
+    # Try to get the speed value
+    match = _SPEED_LIMIT_RE.search(description)
+    if match:
+        return f"speed_{match.group(1)}"
+    if _SPEED_LIMIT_KW_RE.search(description):
         return 'speed_limit'
-    else:
-        return 'other'
+    return 'other'
 
 
+@functools.lru_cache(maxsize=16)
 def get_sign_type_label(sign_type: str) -> str:
     """Get human-readable label for sign type."""
     labels = {
@@ -169,16 +469,80 @@ def get_sign_type_label(sign_type: str) -> str:
     return labels.get(sign_type, sign_type)
 
 
-def signs_to_geojson(signs: List[Dict[str, Any]]) -> Dict[str, Any]:
-    """Convert sign list to GeoJSON FeatureCollection."""
+def signs_to_geojson(signs, serialize: bool = False):
+    """
+    Convert signs to a GeoJSON FeatureCollection.
+    
+    Accepts either the list-of-dicts form from parse_nyc_speed_signs or the
+    column dict from parse_nyc_speed_signs_soa.
+    
+    Args:
+        signs: Parsed signs in either form
+        serialize: When True, return serialized JSON bytes (via orjson when
+            installed) instead of a dict, skipping any intermediate
+            Python-level encoding by the caller
+    """
     features = []
     
-    for sign in signs:
-        feature = {
+    if isinstance(signs, dict):
+        # SoA form: zip the parallel columns, skipping per-row hash lookups
+        for sign_id, sign_code, description, sign_type, speed, lon, lat in zip(
+                signs['id'], signs['sign_code'], signs['description'],
+                signs['sign_type'], signs['speed_limit'],
+                signs['longitude'], signs['latitude']):
+            features.append({
+                'type': 'Feature',
+                'geometry': {
+                    'type': 'Point',
+                    'coordinates': (float(lon), float(lat))
+                },
+                'properties': {
+                    'id': sign_id,
+                    'sign_code': sign_code,
+                    'description': description,
+                    'sign_type': sign_type,
+                    'speed_limit': int(speed) if speed else None
+                }
+            })
+    else:
+        for sign in signs:
+            feature = {
+                'type': 'Feature',
+                'geometry': {
+                    'type': 'Point',
+                    'coordinates': (sign['longitude'], sign['latitude'])
+                },
+                'properties': {
+                    'id': sign['id'],
+                    'sign_code': sign['sign_code'],
+                    'description': sign['description'],
+                    'sign_type': sign['sign_type'],
+                    'speed_limit': sign['speed_limit']
+                }
+            }
+            features.append(feature)
+    
+    collection = {
+        'type': 'FeatureCollection',
+        'features': features
+    }
+    
+    if serialize:
+        if HAS_ORJSON:
+            return orjson.dumps(collection, option=orjson.OPT_SERIALIZE_NUMPY)
+        return json.dumps(collection).encode('utf-8')
+    
+    return collection
+
+
+def iter_features(signs_iter) -> Iterator[Dict[str, Any]]:
+    """Yield GeoJSON Feature dicts for an iterable of sign dicts."""
+    for sign in signs_iter:
+        yield {
             'type': 'Feature',
             'geometry': {
                 'type': 'Point',
-                'coordinates': [sign['longitude'], sign['latitude']]
+                'coordinates': (sign['longitude'], sign['latitude'])
             },
             'properties': {
                 'id': sign['id'],
@@ -188,34 +552,61 @@ def signs_to_geojson(signs: List[Dict[str, Any]]) -> Dict[str, Any]:
                 'speed_limit': sign['speed_limit']
             }
         }
-        features.append(feature)
+
+
+def stream_geojson_to(path: str, signs_iter) -> int:
+    """
+    Write a GeoJSON FeatureCollection to a file with constant memory.
     
-    return {
-        'type': 'FeatureCollection',
-        'features': features
-    }
+    Features are serialized one at a time (orjson when installed), so the
+    collection never exists in memory as a whole.
+    
+    Returns:
+        Number of features written
+    """
+    if HAS_ORJSON:
+        dumps = orjson.dumps
+    else:
+        def dumps(obj):
+            return json.dumps(obj).encode('utf-8')
+    
+    count = 0
+    with open(path, 'wb') as f:
+        f.write(b'{"type": "FeatureCollection", "features": [')
+        for feature in iter_features(signs_iter):
+            if count:
+                f.write(b',')
+            f.write(dumps(feature))
+            count += 1
+        f.write(b']}')
+    
+    return count
 
 
-def get_sign_stats(signs: List[Dict[str, Any]]) -> Dict[str, Any]:
-    """Get statistics about the signs."""
-    stats = {
-        'total': len(signs),
-        'by_type': {},
-        'by_speed': {}
-    }
+def get_sign_stats(signs) -> Dict[str, Any]:
+    """
+    Get statistics about the signs.
     
-    for sign in signs:
-        # Count by type
-        sign_type = sign['sign_type']
-        stats['by_type'][sign_type] = stats['by_type'].get(sign_type, 0) + 1
-        
-        # Count by speed limit
-        speed = sign['speed_limit']
-        if speed:
-            speed_key = f"{speed}mph"
-            stats['by_speed'][speed_key] = stats['by_speed'].get(speed_key, 0) + 1
+    Accepts either the list-of-dicts form or the SoA column dict.
+    """
+    # Counter's C-implemented counting does one lookup per increment versus
+    # the two of dict.get(...) + assignment
+    if isinstance(signs, dict):
+        types = signs['sign_type']
+        speeds = signs['speed_limit']
+        return {
+            'total': len(types),
+            'by_type': dict(Counter(types)),
+            'by_speed': dict(Counter(f"{speed}mph" for speed in speeds[speeds > 0]))
+        }
     
-    return stats
+    return {
+        'total': len(signs),
+        'by_type': dict(Counter(sign['sign_type'] for sign in signs)),
+        'by_speed': dict(Counter(
+            f"{sign['speed_limit']}mph" for sign in signs if sign['speed_limit']
+        ))
+    }
 
 
 # Module test
@@ -4,17 +4,50 @@ Extracts GPS, timestamp, and link_id from vehicle camera images.
 """
 import os
 import json
+import mmap
+import struct
+import queue
+import time
 import sqlite3
 import asyncio
 import threading
-from pathlib import Path
 from datetime import datetime
 from typing import Optional, Dict, List, Any, Tuple
 from contextlib import contextmanager
 from dataclasses import dataclass, asdict
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+import numpy as np
 from PIL import Image
-from PIL.ExifTags import TAGS
+
+# The only EXIF tags we consume, by their fixed ids (see the EXIF spec);
+# direct integer access skips remapping every tag to its string name
+# Scanner suffix fast path: the two spellings that actually occur, checked
+# with endswith so the common case never lowercases the entry name; rare
+# mixed case falls through to a 4-character lower() in _iter_jpgs. Matches
+# the original lower().endswith('.jpg') exactly — '.jpeg' stays excluded.
+_JPG_SUFFIXES = ('.jpg', '.JPG')
+
+_GPSINFO_TAG = 0x8825
+_DATETIME_TAG = 0x0132
+_DATETIME_ORIG_TAG = 0x9003
+_IMGDESC_TAG = 0x010E
+_EXIF_IFD_TAG = 0x8769
+
+# Optional piexif for header-only EXIF reads: parses just the APP1 segment
+# without decoding the image (PIL fallback below)
+try:
+    import piexif
+    HAS_PIEXIF = True
+except ImportError:
+    HAS_PIEXIF = False
+    print("Warning: piexif not installed. Using PIL for EXIF. Install with: pip install piexif")
+
+# Optional orjson for the per-image description parse (stdlib json fallback)
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
 
 
 @dataclass
@@ -40,74 +73,301 @@ def dms_to_decimal(dms: Tuple, ref: str) -> float:
     return decimal
 
 
-def extract_metadata_from_image(image_path: str, camera_type: str) -> Optional[ImageMetadata]:
-    """Extract EXIF metadata from a single image file."""
+# Raw extract: metadata with lat/lon still unset, plus the DMS triples and
+# hemisphere refs needed to finish the conversion (scalar for single files,
+# vectorized in the scan writer)
+_RawExtract = Tuple[ImageMetadata, Tuple[float, float, float], str,
+                    Tuple[float, float, float], str]
+
+
+def _finish_metadata(image_path: str, camera_type: str, latitude: float,
+                     longitude: float, timestamp: str, description: str) -> ImageMetadata:
+    """Assemble an ImageMetadata record from extracted EXIF fields."""
+    # Extract link_id and forward from ImageDescription (orjson's C parser
+    # when available; both decoders raise ValueError subclasses on bad input)
     try:
-        with Image.open(image_path) as img:
-            exif = img._getexif()
-            if not exif:
-                return None
-            
-            exif_data = {}
-            for tag_id, value in exif.items():
-                tag = TAGS.get(tag_id, tag_id)
-                exif_data[tag] = value
-            
-            # Extract GPS coordinates
-            gps_info = exif_data.get('GPSInfo', {})
-            if not gps_info or 2 not in gps_info or 4 not in gps_info:
-                return None
-            
-            lat_ref = gps_info.get(1, 'N')
-            lat_dms = gps_info.get(2)
-            lon_ref = gps_info.get(3, 'W')
-            lon_dms = gps_info.get(4)
-            
-            latitude = dms_to_decimal(lat_dms, lat_ref)
-            longitude = dms_to_decimal(lon_dms, lon_ref)
+        if HAS_ORJSON:
+            desc_json = orjson.loads(description)
+        else:
+            desc_json = json.loads(description)
+        link_id = desc_json.get('link_id')
+        forward = desc_json.get('forward')
+    except (ValueError, TypeError):
+        link_id = None
+        forward = None
+    
+    # Parse filename for device_id and sequence (plain string splits: no
+    # Path object allocation on this per-image path)
+    filename = image_path.rpartition(os.sep)[2]
+    parts = filename.replace('.jpg', '').split('_')
+    device_id = parts[0] if parts else 'unknown'
+    
+    # Calculate sequence from path: .../00000/origin/file.jpg
+    path_parts = image_path.rsplit(os.sep, 4)
+    try:
+        sequence = int(path_parts[-3])
+    except (ValueError, IndexError):
+        sequence = 0
+    
+    return ImageMetadata(
+        file_path=image_path,
+        device_id=device_id,
+        camera_type=camera_type,
+        latitude=latitude,
+        longitude=longitude,
+        timestamp=timestamp,
+        link_id=link_id,
+        forward=forward,
+        sequence=sequence
+    )
+
+
+def _extract_via_piexif(image_path: str, camera_type: str) -> Optional[_RawExtract]:
+    """Header-only EXIF read: no image object is ever built."""
+    exif = piexif.load(image_path)
+    
+    gps_info = exif.get('GPS') or {}
+    if 2 not in gps_info or 4 not in gps_info:
+        return None
+    
+    lat_ref = gps_info.get(1, b'N')
+    lon_ref = gps_info.get(3, b'W')
+    if isinstance(lat_ref, bytes):
+        lat_ref = lat_ref.decode('ascii', 'replace')
+    if isinstance(lon_ref, bytes):
+        lon_ref = lon_ref.decode('ascii', 'replace')
+    
+    lat_dms = tuple(num / den for num, den in gps_info[2])
+    lon_dms = tuple(num / den for num, den in gps_info[4])
+    # Anything but the standard 3 DMS rationals would make the vectorized
+    # batch conversion ragged; treat it like any other GPS-less file
+    if len(lat_dms) != 3 or len(lon_dms) != 3:
+        return None
+
+    zeroth = exif.get('0th') or {}
+    timestamp = zeroth.get(piexif.ImageIFD.DateTime) or \
+        (exif.get('Exif') or {}).get(piexif.ExifIFD.DateTimeOriginal, b'')
+    if isinstance(timestamp, bytes):
+        timestamp = timestamp.decode('ascii', 'replace')
+    
+    description = zeroth.get(piexif.ImageIFD.ImageDescription, b'{}')
+    if isinstance(description, bytes):
+        description = description.decode('utf-8', 'replace')
+    
+    metadata = _finish_metadata(image_path, camera_type, 0.0, 0.0, timestamp, description)
+    return metadata, lat_dms, lat_ref, lon_dms, lon_ref
+
+
+def _extract_via_pil(image_path: str, camera_type: str) -> Optional[_RawExtract]:
+    """PIL fallback: opens the image object to reach its EXIF."""
+    with Image.open(image_path) as img:
+        exif = img._getexif()
+        if not exif:
+            return None
+        
+        # Extract GPS coordinates (direct integer-tag lookups: O(4) instead
+        # of walking and remapping every tag in the EXIF)
+        gps_info = exif.get(_GPSINFO_TAG) or {}
+        if 2 not in gps_info or 4 not in gps_info:
+            return None
+        
+        lat_ref = gps_info.get(1, 'N')
+        lat_dms = tuple(float(v) for v in gps_info[2])
+        lon_ref = gps_info.get(3, 'W')
+        lon_dms = tuple(float(v) for v in gps_info[4])
+        # Malformed DMS (see _extract_via_piexif) is skipped, not raised
+        if len(lat_dms) != 3 or len(lon_dms) != 3:
+            return None
+
+        # Extract timestamp
+        timestamp = exif.get(_DATETIME_TAG) or exif.get(_DATETIME_ORIG_TAG, '')
+        
+        description = exif.get(_IMGDESC_TAG, '{}')
+        
+        metadata = _finish_metadata(image_path, camera_type, 0.0, 0.0, timestamp, description)
+        return metadata, lat_dms, lat_ref, lon_dms, lon_ref
+
+
+# TIFF field type sizes in bytes, indexed by type id (BYTE, ASCII, SHORT,
+# LONG, RATIONAL, ..., SRATIONAL); values no larger than 4 bytes are stored
+# inline in the IFD entry, larger ones behind an offset
+_TIFF_TYPE_SIZES = {1: 1, 2: 1, 3: 2, 4: 4, 5: 8, 7: 1, 9: 4, 10: 8}
+
+
+def _read_ifd(mm, tiff_base: int, offset: int, bo: str) -> dict:
+    """Read one IFD into {tag: (type, count, value_position)}."""
+    count = struct.unpack_from(bo + 'H', mm, tiff_base + offset)[0]
+    entries = {}
+    pos = tiff_base + offset + 2
+    for _ in range(count):
+        tag, typ, n = struct.unpack_from(bo + 'HHI', mm, pos)
+        entries[tag] = (typ, n, pos + 8)
+        pos += 12
+    return entries
+
+
+def _ifd_value_offset(mm, tiff_base: int, entry, bo: str) -> int:
+    typ, n, val_pos = entry
+    if _TIFF_TYPE_SIZES.get(typ, 1) * n <= 4:
+        return val_pos
+    return tiff_base + struct.unpack_from(bo + 'I', mm, val_pos)[0]
+
+
+def _ifd_ascii(mm, tiff_base: int, entry, bo: str) -> str:
+    off = _ifd_value_offset(mm, tiff_base, entry, bo)
+    raw = bytes(mm[off:off + entry[1]])
+    return raw.split(b'\x00', 1)[0].decode('utf-8', 'replace')
+
+
+def _ifd_long(mm, tiff_base: int, entry, bo: str) -> int:
+    return struct.unpack_from(bo + 'I', mm, entry[2])[0]
+
+
+def _ifd_rational3(mm, tiff_base: int, entry, bo: str) -> Tuple[float, float, float]:
+    typ, n, _ = entry
+    # GPS DMS must be exactly 3 RATIONALs; anything else would decode as
+    # garbage coordinates, so raise and let callers take the full parsers
+    if typ != 5 or n != 3:
+        raise ValueError('expected 3 RATIONALs')
+    off = _ifd_value_offset(mm, tiff_base, entry, bo)
+    v = struct.unpack_from(bo + '6I', mm, off)
+    return (v[0] / (v[1] or 1), v[2] / (v[3] or 1), v[4] / (v[5] or 1))
+
+
+def _extract_via_mmap(image_path: str, camera_type: str) -> Optional[_RawExtract]:
+    """Lowest-level fast path: parse only the three EXIF fields we consume.
+    
+    Memory-maps the JPEG, locates the APP1 segment in the leading 64KB and
+    walks the TIFF IFDs with struct.unpack_from — no image decode and no
+    full EXIF traverse. Raises on anything structurally unexpected so
+    callers fall back to the full parsers; returns None only when the file
+    is well-formed but carries no GPS position.
+    """
+    with open(image_path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm[0:2] != b'\xff\xd8':
+                raise ValueError('not a JPEG')
+            app1 = mm.find(b'\xff\xe1', 2, 65536)
+            if app1 < 0 or mm[app1 + 4:app1 + 10] != b'Exif\x00\x00':
+                raise ValueError('no APP1 Exif segment')
+            tiff_base = app1 + 10
             
-            # Extract timestamp
-            timestamp = exif_data.get('DateTime', exif_data.get('DateTimeOriginal', ''))
+            order = mm[tiff_base:tiff_base + 2]
+            if order == b'II':
+                bo = '<'
+            elif order == b'MM':
+                bo = '>'
+            else:
+                raise ValueError('bad TIFF byte-order mark')
+            if struct.unpack_from(bo + 'H', mm, tiff_base + 2)[0] != 42:
+                raise ValueError('bad TIFF magic')
             
-            # Extract link_id and forward from ImageDescription
-            description = exif_data.get('ImageDescription', '{}')
-            try:
-                desc_json = json.loads(description)
-                link_id = desc_json.get('link_id')
-                forward = desc_json.get('forward')
-            except (json.JSONDecodeError, TypeError):
-                link_id = None
-                forward = None
+            ifd0_offset = struct.unpack_from(bo + 'I', mm, tiff_base + 4)[0]
+            ifd0 = _read_ifd(mm, tiff_base, ifd0_offset, bo)
             
-            # Parse filename for device_id and sequence
-            filename = os.path.basename(image_path)
-            parts = filename.replace('.jpg', '').split('_')
-            device_id = parts[0] if parts else 'unknown'
+            gps_entry = ifd0.get(_GPSINFO_TAG)
+            if gps_entry is None:
+                return None
+            gps = _read_ifd(mm, tiff_base, _ifd_long(mm, tiff_base, gps_entry, bo), bo)
+            if 2 not in gps or 4 not in gps:
+                return None
+            lat_ref = _ifd_ascii(mm, tiff_base, gps[1], bo) if 1 in gps else 'N'
+            lon_ref = _ifd_ascii(mm, tiff_base, gps[3], bo) if 3 in gps else 'W'
+            lat_dms = _ifd_rational3(mm, tiff_base, gps[2], bo)
+            lon_dms = _ifd_rational3(mm, tiff_base, gps[4], bo)
             
-            # Calculate sequence from path
-            path_parts = Path(image_path).parts
-            seq_idx = -3  # .../00000/origin/file.jpg
-            try:
-                sequence = int(path_parts[seq_idx])
-            except (ValueError, IndexError):
-                sequence = 0
+            timestamp = ''
+            if _DATETIME_TAG in ifd0:
+                timestamp = _ifd_ascii(mm, tiff_base, ifd0[_DATETIME_TAG], bo)
+            elif _EXIF_IFD_TAG in ifd0:
+                exif_ifd = _read_ifd(
+                    mm, tiff_base, _ifd_long(mm, tiff_base, ifd0[_EXIF_IFD_TAG], bo), bo)
+                if _DATETIME_ORIG_TAG in exif_ifd:
+                    timestamp = _ifd_ascii(mm, tiff_base, exif_ifd[_DATETIME_ORIG_TAG], bo)
             
-            return ImageMetadata(
-                file_path=image_path,
-                device_id=device_id,
-                camera_type=camera_type,
-                latitude=latitude,
-                longitude=longitude,
-                timestamp=timestamp,
-                link_id=link_id,
-                forward=forward,
-                sequence=sequence
-            )
+            description = '{}'
+            if _IMGDESC_TAG in ifd0:
+                description = _ifd_ascii(mm, tiff_base, ifd0[_IMGDESC_TAG], bo)
+    
+    metadata = _finish_metadata(image_path, camera_type, 0.0, 0.0, timestamp, description)
+    return metadata, lat_dms, lat_ref, lon_dms, lon_ref
+
+
+def extract_metadata_fast(image_path: str, camera_type: str) -> Optional[ImageMetadata]:
+    """Extract via the mmap fast path, falling back to the full parsers."""
+    try:
+        raw = _extract_via_mmap(image_path, camera_type)
+    except Exception:
+        return extract_metadata_from_image(image_path, camera_type)
+    if raw is None:
+        return None
+    metadata, lat_dms, lat_ref, lon_dms, lon_ref = raw
+    metadata.latitude = dms_to_decimal(lat_dms, lat_ref)
+    metadata.longitude = dms_to_decimal(lon_dms, lon_ref)
+    return metadata
+
+
+def extract_metadata_from_image(image_path: str, camera_type: str) -> Optional[ImageMetadata]:
+    """Extract EXIF metadata from a single image file."""
+    raw = _extract_one((image_path, camera_type))
+    if raw is None:
+        return None
+    metadata, lat_dms, lat_ref, lon_dms, lon_ref = raw
+    metadata.latitude = dms_to_decimal(lat_dms, lat_ref)
+    metadata.longitude = dms_to_decimal(lon_dms, lon_ref)
+    return metadata
+
+
+def _extract_chunk(chunk: List[Tuple[str, str]]) -> List[Optional[_RawExtract]]:
+    """Pool task: extract a chunk of files in one IPC round trip."""
+    return [_extract_one(args) for args in chunk]
+
+
+def _extract_one(args: Tuple[str, str]) -> Optional[_RawExtract]:
+    """Pool worker: extract one file, leaving the DMS conversion raw."""
+    image_path, camera_type = args
+    try:
+        return _extract_via_mmap(image_path, camera_type)
+    except Exception:
+        pass  # malformed or unusual layout: take the full parsers below
+    try:
+        if HAS_PIEXIF:
+            return _extract_via_piexif(image_path, camera_type)
+        return _extract_via_pil(image_path, camera_type)
     except Exception as e:
         print(f"Error extracting metadata from {image_path}: {e}")
         return None
 
 
+def _convert_dms_batch(raw_items: List[_RawExtract]) -> List[ImageMetadata]:
+    """Finish a batch of raw extracts with one vectorized DMS conversion.
+    
+    A single NumPy pass over contiguous float64 arrays replaces two scalar
+    degree/minute/second conversions per image.
+    """
+    lat_arr = np.asarray([r[1] for r in raw_items], dtype=np.float64)
+    lon_arr = np.asarray([r[3] for r in raw_items], dtype=np.float64)
+    lat = lat_arr[:, 0] + lat_arr[:, 1] / 60 + lat_arr[:, 2] / 3600
+    lon = lon_arr[:, 0] + lon_arr[:, 1] / 60 + lon_arr[:, 2] / 3600
+    lat = np.where(np.asarray([r[2] for r in raw_items]) == 'S', -lat, lat)
+    lon = np.where(np.asarray([r[4] for r in raw_items]) == 'W', -lon, lon)
+    
+    metadata_list = []
+    for raw, lat_val, lon_val in zip(raw_items, lat, lon):
+        metadata = raw[0]
+        metadata.latitude = float(lat_val)
+        metadata.longitude = float(lon_val)
+        metadata_list.append(metadata)
+    return metadata_list
+
+
+# Bump when _init_db's schema changes so existing databases re-run the DDL
+_SCHEMA_VERSION = 3
+
+# Upper bound on how long _cached_read may serve a memoized aggregate
+_CACHE_TTL_SECONDS = 30.0
+
+
 class MetadataCache:
     """SQLite-based cache for image metadata with thread-local connection pooling."""
     
@@ -115,6 +375,55 @@ class MetadataCache:
         self.db_path = db_path
         self._local = threading.local()
         self._init_db()
+        
+        # Version-keyed memo for the heavy aggregate reads: bumped on every
+        # committed write, so stale results can never be served. Entries
+        # additionally expire after a TTL: the version only tracks writes
+        # made through this process, and tools like run_full_detection.py
+        # write through their own MetadataCache
+        self._data_version = 0
+        self._result_cache: Dict[Tuple[str, int], Tuple[float, Any]] = {}
+        
+        # Single writer: SQLite allows one writer at a time anyway, so all
+        # mutations serialize through this connection behind a lock instead
+        # of racing for the file lock
+        self._write_lock = threading.Lock()
+        # isolation_level=None disables Python's implicit BEGIN so the
+        # transaction() helper controls locking explicitly
+        self._write_conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._write_conn.row_factory = sqlite3.Row
+        self._apply_pragmas(self._write_conn)
+        
+        # Bounded pool of read-only connections so readers run fully
+        # concurrently with each other and with the writer (WAL)
+        pool_size = min(os.cpu_count() or 4, 8)
+        self._read_pool: queue.Queue = queue.Queue(maxsize=pool_size)
+        for _ in range(pool_size):
+            conn = sqlite3.connect(f'file:{self.db_path}?mode=ro', uri=True, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            self._apply_pragmas(conn, readonly=True)
+            self._read_pool.put(conn)
+    
+    @staticmethod
+    def _apply_pragmas(conn, readonly: bool = False):
+        """Apply per-connection tuning pragmas.
+        
+        journal_mode=WAL is not set here: it is a persistent database-level
+        setting written once in _init_db, so re-issuing it per connection
+        only costs a header round-trip.
+        """
+        if not readonly:
+            conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA busy_timeout=5000')
+        conn.execute('PRAGMA cache_size=-64000')  # 64MB cache
+        conn.execute('PRAGMA temp_store=MEMORY')
+        if readonly:
+            # Read pool serves the large trip/link scans: a bigger mmap
+            # window lets SQLite read pages straight from the OS page cache
+            # instead of pread-copying them
+            conn.execute('PRAGMA mmap_size=1073741824')  # 1GB
+        else:
+            conn.execute('PRAGMA mmap_size=268435456')  # 256MB
     
     @contextmanager
     def get_connection(self):
@@ -122,133 +431,214 @@ class MetadataCache:
         if not hasattr(self._local, 'conn') or self._local.conn is None:
             self._local.conn = sqlite3.connect(self.db_path, check_same_thread=False)
             self._local.conn.row_factory = sqlite3.Row
-            # Enable WAL mode for better concurrent read performance
-            self._local.conn.execute('PRAGMA journal_mode=WAL')
-            self._local.conn.execute('PRAGMA synchronous=NORMAL')
-            self._local.conn.execute('PRAGMA cache_size=-64000')  # 64MB cache
+            self._apply_pragmas(self._local.conn)
         yield self._local.conn
     
-    def _init_db(self):
-        """Initialize the SQLite database schema."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    @contextmanager
+    def get_write_conn(self):
+        """Get the single writer connection (serialized by a lock)."""
+        with self._write_lock:
+            yield self._write_conn
+    
+    @contextmanager
+    def transaction(self):
+        """
+        Writer transaction: BEGIN IMMEDIATE ... COMMIT, ROLLBACK on error.
         
-        # Images table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS images (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                file_path TEXT UNIQUE NOT NULL,
-                device_id TEXT NOT NULL,
-                camera_type TEXT NOT NULL,
-                latitude REAL NOT NULL,
-                longitude REAL NOT NULL,
-                timestamp TEXT NOT NULL,
-                link_id INTEGER,
-                forward INTEGER,
-                sequence INTEGER,
-                detected INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
+        BEGIN IMMEDIATE takes the write lock up-front, so the transaction
+        never races a shared-to-exclusive lock upgrade into SQLITE_BUSY the
+        way implicit auto-begin can under concurrent writers.
+        """
+        with self._write_lock:
+            self._write_conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield self._write_conn
+            except BaseException:
+                self._write_conn.execute('ROLLBACK')
+                raise
+            else:
+                self._write_conn.execute('COMMIT')
+                self._data_version += 1
+                self._result_cache.clear()
+    
+    @contextmanager
+    def get_read_conn(self):
+        """Borrow a read-only connection from the pool."""
+        conn = self._read_pool.get()
+        try:
+            yield conn
+        finally:
+            self._read_pool.put(conn)
+    
+    def _init_db(self):
+        """Initialize the SQLite database schema.
         
-        # Migration: Add 'detected' column if it doesn't exist
+        Uses a short-lived connection: this runs once from __init__ before
+        any thread-local connections exist. PRAGMA user_version gates the
+        DDL, so already-initialized databases skip the schema parsing and
+        catalog probing entirely — bump _SCHEMA_VERSION when the schema
+        changes to re-run it.
+        """
+        conn = sqlite3.connect(self.db_path)
         try:
-            cursor.execute('SELECT detected FROM images LIMIT 1')
-        except sqlite3.OperationalError:
-            print("[Migration] Adding 'detected' column to images table...")
-            cursor.execute('ALTER TABLE images ADD COLUMN detected INTEGER DEFAULT 0')
+            # WAL is persistent (stored in the database header), so enabling
+            # it once here covers every later connection
+            if self.db_path != ':memory:':
+                conn.execute('PRAGMA journal_mode=WAL')
+            
+            if conn.execute('PRAGMA user_version').fetchone()[0] == _SCHEMA_VERSION:
+                return
+            
+            # Images table
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS images (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    file_path TEXT UNIQUE NOT NULL,
+                    device_id TEXT NOT NULL,
+                    camera_type TEXT NOT NULL,
+                    latitude REAL NOT NULL,
+                    longitude REAL NOT NULL,
+                    timestamp TEXT NOT NULL,
+                    link_id INTEGER,
+                    forward INTEGER,
+                    sequence INTEGER,
+                    detected INTEGER DEFAULT 0,
+                    trip_date TEXT GENERATED ALWAYS AS (substr(timestamp, 1, 10)) VIRTUAL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # Migration: Add 'detected' column if it doesn't exist
+            try:
+                conn.execute('SELECT detected FROM images LIMIT 1')
+            except sqlite3.OperationalError:
+                print("[Migration] Adding 'detected' column to images table...")
+                conn.execute('ALTER TABLE images ADD COLUMN detected INTEGER DEFAULT 0')
+            
+            # Migration: generated trip_date column so per-day queries hit an
+            # index instead of calling SUBSTR per row. ALTER TABLE cannot add
+            # STORED generated columns, so it is VIRTUAL; idx_device_tripdate
+            # below materializes the values anyway.
+            try:
+                conn.execute('SELECT trip_date FROM images LIMIT 1')
+            except sqlite3.OperationalError:
+                print("[Migration] Adding 'trip_date' column to images table...")
+                conn.execute(
+                    "ALTER TABLE images ADD COLUMN trip_date TEXT "
+                    "GENERATED ALWAYS AS (substr(timestamp, 1, 10)) VIRTUAL"
+                )
+            
+            # Remaining tables and indexes in one script: a single
+            # Python-to-C round trip instead of one per statement
+            conn.executescript('''
+                -- Notifications table for tracking new data
+                CREATE TABLE IF NOT EXISTS notifications (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    type TEXT NOT NULL,
+                    device_id TEXT,
+                    date TEXT,
+                    message TEXT NOT NULL,
+                    count INTEGER DEFAULT 0,
+                    read INTEGER DEFAULT 0,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                );
+                
+                -- Per-link aggregates so get_links serves the map UI without
+                -- re-scanning the images table; refreshed by the insert paths
+                CREATE TABLE IF NOT EXISTS link_summary (
+                    link_id INTEGER PRIMARY KEY,
+                    center_lat REAL,
+                    center_lon REAL,
+                    min_lat REAL,
+                    max_lat REAL,
+                    min_lon REAL,
+                    max_lon REAL,
+                    point_count INTEGER
+                );
+                
+                -- Detections table for YOLO speed sign detections
+                CREATE TABLE IF NOT EXISTS detections (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    image_id INTEGER NOT NULL,
+                    class_name TEXT NOT NULL,
+                    confidence REAL NOT NULL,
+                    bbox_x1 REAL NOT NULL,
+                    bbox_y1 REAL NOT NULL,
+                    bbox_x2 REAL NOT NULL,
+                    bbox_y2 REAL NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (image_id) REFERENCES images(id)
+                );
+                
+                -- Indexes for images
+                CREATE INDEX IF NOT EXISTS idx_device_id ON images(device_id);
+                CREATE INDEX IF NOT EXISTS idx_timestamp ON images(timestamp);
+                CREATE INDEX IF NOT EXISTS idx_camera_type ON images(camera_type);
+                CREATE INDEX IF NOT EXISTS idx_link_id ON images(link_id);
+                CREATE INDEX IF NOT EXISTS idx_detected ON images(detected);
+                CREATE INDEX IF NOT EXISTS idx_device_tripdate ON images(device_id, trip_date);
+                
+                -- Indexes for notifications
+                CREATE INDEX IF NOT EXISTS idx_notification_read ON notifications(read);
+                CREATE INDEX IF NOT EXISTS idx_notification_type ON notifications(type);
+                
+                -- Indexes for detections
+                CREATE INDEX IF NOT EXISTS idx_detection_image ON detections(image_id);
+                CREATE INDEX IF NOT EXISTS idx_detection_class ON detections(class_name);
+                
+                -- Composite indexes for common queries
+                CREATE INDEX IF NOT EXISTS idx_device_timestamp 
+                ON images(device_id, timestamp);
+                CREATE INDEX IF NOT EXISTS idx_device_camera_timestamp 
+                ON images(device_id, camera_type, timestamp);
+                CREATE INDEX IF NOT EXISTS idx_trip_lookup 
+                ON images(device_id, camera_type, timestamp, file_path);
+                
+                -- Covering indexes for the detection join: an index-only scan
+                -- on images feeds detections rows already ordered on image_id
+                CREATE INDEX IF NOT EXISTS idx_images_device_time_id 
+                ON images(device_id, timestamp, id);
+                CREATE INDEX IF NOT EXISTS idx_detections_image_class_conf
+                ON detections(image_id, class_name, confidence);
+            ''')
+
+            # One-time backfill: databases migrated from before link_summary
+            # existed already hold link rows in images, and get_links reads
+            # only the summary table — aggregate them now so the link list
+            # survives the upgrade. Upsert so a partially-populated table
+            # (interrupted earlier migration) converges too.
+            conn.execute('''
+                INSERT INTO link_summary
+                (link_id, center_lat, center_lon, min_lat, max_lat, min_lon, max_lon, point_count)
+                SELECT link_id, AVG(latitude), AVG(longitude),
+                       MIN(latitude), MAX(latitude),
+                       MIN(longitude), MAX(longitude), COUNT(*)
+                FROM images
+                WHERE link_id IS NOT NULL
+                GROUP BY link_id
+                ON CONFLICT(link_id) DO UPDATE SET
+                    center_lat = excluded.center_lat,
+                    center_lon = excluded.center_lon,
+                    min_lat = excluded.min_lat,
+                    max_lat = excluded.max_lat,
+                    min_lon = excluded.min_lon,
+                    max_lon = excluded.max_lon,
+                    point_count = excluded.point_count
+            ''')
+
+            conn.execute(f'PRAGMA user_version = {_SCHEMA_VERSION}')
             conn.commit()
-        
-        # Notifications table for tracking new data
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS notifications (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                type TEXT NOT NULL,
-                device_id TEXT,
-                date TEXT,
-                message TEXT NOT NULL,
-                count INTEGER DEFAULT 0,
-                read INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Detections table for YOLO speed sign detections
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS detections (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                image_id INTEGER NOT NULL,
-                class_name TEXT NOT NULL,
-                confidence REAL NOT NULL,
-                bbox_x1 REAL NOT NULL,
-                bbox_y1 REAL NOT NULL,
-                bbox_x2 REAL NOT NULL,
-                bbox_y2 REAL NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (image_id) REFERENCES images(id)
-            )
-        ''')
-        
-        # Indexes for images
-        cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_device_id ON images(device_id)
-        ''')
-        cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_timestamp ON images(timestamp)
-        ''')
-        cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_camera_type ON images(camera_type)
-        ''')
-        cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_link_id ON images(link_id)
-        ''')
-        cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_detected ON images(detected)
-        ''')
-        
-        # Indexes for notifications
-        cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_notification_read ON notifications(read)
-        ''')
-        cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_notification_type ON notifications(type)
-        ''')
-        
-        # Indexes for detections
-        cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_detection_image ON detections(image_id)
-        ''')
-        cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_detection_class ON detections(class_name)
-        ''')
-        
-        # Composite indexes for common queries (performance optimization)
-        cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_device_timestamp 
-            ON images(device_id, timestamp)
-        ''')
-        cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_device_camera_timestamp 
-            ON images(device_id, camera_type, timestamp)
-        ''')
-        cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_trip_lookup 
-            ON images(device_id, camera_type, timestamp, file_path)
-        ''')
-        
-        conn.commit()
-        conn.close()
+        finally:
+            conn.close()
     
     def insert_metadata(self, metadata: ImageMetadata):
         """Insert a single metadata record into the cache."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        try:
-            cursor.execute('''
-                INSERT OR REPLACE INTO images 
+        with self.transaction() as conn:
+            conn.execute('''
+                INSERT INTO images 
                 (file_path, device_id, camera_type, latitude, longitude, timestamp, link_id, forward, sequence)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(file_path) DO NOTHING
             ''', (
                 metadata.file_path,
                 metadata.device_id,
@@ -260,20 +650,17 @@ class MetadataCache:
                 1 if metadata.forward else 0 if metadata.forward is not None else None,
                 metadata.sequence
             ))
-            conn.commit()
-        finally:
-            conn.close()
+            if metadata.link_id is not None:
+                self._refresh_link_summary(conn, [metadata.link_id])
     
     def insert_batch(self, metadata_list: List[ImageMetadata]):
         """Insert multiple metadata records in a batch."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        try:
-            cursor.executemany('''
-                INSERT OR REPLACE INTO images 
+        with self.transaction() as conn:
+            conn.executemany('''
+                INSERT INTO images 
                 (file_path, device_id, camera_type, latitude, longitude, timestamp, link_id, forward, sequence)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(file_path) DO NOTHING
             ''', [
                 (
                     m.file_path, m.device_id, m.camera_type, m.latitude, m.longitude,
@@ -283,368 +670,389 @@ class MetadataCache:
                 )
                 for m in metadata_list
             ])
-            conn.commit()
-        finally:
-            conn.close()
+            link_ids = {m.link_id for m in metadata_list if m.link_id is not None}
+            if link_ids:
+                self._refresh_link_summary(conn, link_ids)
+    
+    def _refresh_link_summary(self, conn, link_ids):
+        """Re-aggregate link_summary rows for the given link_ids.
+        
+        Runs inside the caller's transaction; chunked to stay under
+        SQLite's bound-parameter limit.
+        """
+        link_ids = sorted(link_ids)
+        for i in range(0, len(link_ids), 500):
+            chunk = link_ids[i:i + 500]
+            placeholders = ','.join('?' * len(chunk))
+            conn.execute(f'''
+                INSERT INTO link_summary 
+                (link_id, center_lat, center_lon, min_lat, max_lat, min_lon, max_lon, point_count)
+                SELECT link_id, AVG(latitude), AVG(longitude),
+                       MIN(latitude), MAX(latitude),
+                       MIN(longitude), MAX(longitude), COUNT(*)
+                FROM images
+                WHERE link_id IN ({placeholders})
+                GROUP BY link_id
+                ON CONFLICT(link_id) DO UPDATE SET
+                    center_lat = excluded.center_lat,
+                    center_lon = excluded.center_lon,
+                    min_lat = excluded.min_lat,
+                    max_lat = excluded.max_lat,
+                    min_lon = excluded.min_lon,
+                    max_lon = excluded.max_lon,
+                    point_count = excluded.point_count
+            ''', chunk)
+    
+    def _cached_read(self, name: str, compute):
+        """Serve a parameterless aggregate from the memo, recomputing after
+        a committed write has bumped the data version or the entry has
+        outlived the TTL (which bounds staleness from other processes
+        writing to the same database file)."""
+        key = (name, self._data_version)
+        hit = self._result_cache.get(key)
+        if hit is not None and time.monotonic() - hit[0] < _CACHE_TTL_SECONDS:
+            return hit[1]
+        value = compute()
+        self._result_cache[key] = (time.monotonic(), value)
+        return value
     
     def get_devices(self) -> List[Dict[str, Any]]:
         """Get list of unique devices with image counts."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT device_id, 
-                   COUNT(*) as total_images,
-                   COUNT(DISTINCT DATE(timestamp)) as total_days,
-                   MIN(timestamp) as first_seen,
-                   MAX(timestamp) as last_seen
-            FROM images
-            GROUP BY device_id
-            ORDER BY device_id
-        ''')
-        
-        results = []
-        for row in cursor.fetchall():
-            results.append({
-                'device_id': row[0],
-                'total_images': row[1],
-                'total_days': row[2],
-                'first_seen': row[3],
-                'last_seen': row[4]
-            })
-        
-        conn.close()
-        return results
+        return self._cached_read('devices', self._load_devices)
+    
+    def _load_devices(self) -> List[Dict[str, Any]]:
+        with self.get_read_conn() as conn:
+            cursor = conn.execute('''
+                SELECT device_id, 
+                       COUNT(*) as total_images,
+                       COUNT(DISTINCT DATE(timestamp)) as total_days,
+                       MIN(timestamp) as first_seen,
+                       MAX(timestamp) as last_seen
+                FROM images
+                GROUP BY device_id
+                ORDER BY device_id
+            ''')
+            
+            return [
+                {
+                    'device_id': row[0],
+                    'total_images': row[1],
+                    'total_days': row[2],
+                    'first_seen': row[3],
+                    'last_seen': row[4]
+                }
+                for row in cursor.fetchall()
+            ]
     
     def get_trips(self, device_id: str) -> List[Dict[str, Any]]:
         """Get list of trips (dates) for a specific device."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Timestamp format is "2025:10:01 12:27:48" - extract date part using substr
-        cursor.execute('''
-            SELECT REPLACE(SUBSTR(timestamp, 1, 10), ':', '-') as trip_date,
-                   COUNT(*) as image_count,
-                   MIN(timestamp) as start_time,
-                   MAX(timestamp) as end_time,
-                   COUNT(DISTINCT link_id) as unique_links
-            FROM images
-            WHERE device_id = ?
-            GROUP BY SUBSTR(timestamp, 1, 10)
-            ORDER BY trip_date DESC
-        ''', (device_id,))
-        
-        results = []
-        for row in cursor.fetchall():
-            results.append({
-                'date': row[0],
-                'image_count': row[1],
-                'start_time': row[2],
-                'end_time': row[3],
-                'unique_links': row[4]
-            })
-        
-        conn.close()
-        return results
+        with self.get_read_conn() as conn:
+            # Timestamp format is "2025:10:01 12:27:48"; trip_date is the
+            # generated date prefix, so GROUP BY walks idx_device_tripdate
+            cursor = conn.execute('''
+                SELECT REPLACE(trip_date, ':', '-') as date,
+                       COUNT(*) as image_count,
+                       MIN(timestamp) as start_time,
+                       MAX(timestamp) as end_time,
+                       COUNT(DISTINCT link_id) as unique_links
+                FROM images
+                WHERE device_id = ?
+                GROUP BY trip_date
+                ORDER BY trip_date DESC
+            ''', (device_id,))
+            
+            return [
+                {
+                    'date': row[0],
+                    'image_count': row[1],
+                    'start_time': row[2],
+                    'end_time': row[3],
+                    'unique_links': row[4]
+                }
+                for row in cursor.fetchall()
+            ]
     
     def get_trip_details(self, device_id: str, date: str) -> List[Dict[str, Any]]:
         """Get detailed metadata for a specific trip."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        # Convert date format "2025-10-01" back to match stored format "2025:10:01"
-        date_pattern = date.replace('-', ':')
-        
-        query = '''
-            SELECT * FROM images
-            WHERE device_id = ? AND timestamp LIKE ?
-            ORDER BY timestamp ASC, file_path ASC
-        '''
-        
-        cursor.execute(query, (device_id, f'{date_pattern}%'))
-        results = [dict(row) for row in cursor.fetchall()]
-        
-        conn.close()
-        return results
+        with self.get_read_conn() as conn:
+            # Convert date format "2025-10-01" back to match stored format "2025:10:01"
+            cursor = conn.execute('''
+                SELECT * FROM images
+                WHERE device_id = ? AND trip_date = ?
+                ORDER BY timestamp ASC, file_path ASC
+            ''', (device_id, date.replace('-', ':')))
+            return [dict(row) for row in cursor.fetchall()]
     
     def get_links(self) -> List[Dict[str, Any]]:
         """Get unique link_ids with their GPS coordinates for road network visualization."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT link_id, 
-                   AVG(latitude) as center_lat,
-                   AVG(longitude) as center_lon,
-                   MIN(latitude) as min_lat,
-                   MAX(latitude) as max_lat,
-                   MIN(longitude) as min_lon,
-                   MAX(longitude) as max_lon,
-                   COUNT(*) as point_count
-            FROM images
-            WHERE link_id IS NOT NULL
-            GROUP BY link_id
-            HAVING COUNT(*) > 1
-        ''')
-        
-        results = []
-        for row in cursor.fetchall():
-            results.append({
-                'link_id': row[0],
-                'center': [row[2], row[1]],  # [lng, lat] for GeoJSON
-                'bounds': [[row[5], row[3]], [row[6], row[4]]],
-                'point_count': row[7]
-            })
-        
-        conn.close()
-        return results
+        return self._cached_read('links', self._load_links)
+    
+    def _load_links(self) -> List[Dict[str, Any]]:
+        with self.get_read_conn() as conn:
+            # Precomputed by _refresh_link_summary at insert time
+            cursor = conn.execute('''
+                SELECT link_id, center_lat, center_lon,
+                       min_lat, max_lat, min_lon, max_lon, point_count
+                FROM link_summary
+                WHERE point_count > 1
+            ''')
+            
+            return [
+                {
+                    'link_id': row[0],
+                    'center': [row[2], row[1]],  # [lng, lat] for GeoJSON
+                    'bounds': [[row[5], row[3]], [row[6], row[4]]],
+                    'point_count': row[7]
+                }
+                for row in cursor.fetchall()
+            ]
     
     def get_link_path(self, link_id: int) -> List[List[float]]:
         """Get GPS path for a specific link_id."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT longitude, latitude
-            FROM images
-            WHERE link_id = ?
-            ORDER BY timestamp ASC, file_path ASC
-        ''', (link_id,))
+        return self.get_link_path_array(link_id).tolist()
+    
+    def get_link_path_array(self, link_id: int) -> np.ndarray:
+        """Get GPS path for a link as an (N, 2) float64 array of [lng, lat].
         
-        path = [[row[0], row[1]] for row in cursor.fetchall()]
-        conn.close()
-        return path
+        One bulk conversion into contiguous memory instead of a Python
+        list-of-lists per row; tolist() recovers the JSON form when needed.
+        """
+        with self.get_read_conn() as conn:
+            rows = conn.execute('''
+                SELECT longitude, latitude
+                FROM images
+                WHERE link_id = ?
+                ORDER BY timestamp ASC, file_path ASC
+            ''', (link_id,)).fetchall()
+            return np.asarray(rows, dtype=np.float64).reshape(-1, 2)
+    
+    def get_link_path_binary(self, link_id: int) -> bytes:
+        """Get a link path as raw little-endian float32 [lng, lat] pairs."""
+        return self.get_link_path_array(link_id).astype('<f4').tobytes()
     
     def get_image_count(self) -> int:
         """Get total number of images in cache."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('SELECT COUNT(*) FROM images')
-        count = cursor.fetchone()[0]
-        conn.close()
-        return count
+        with self.get_read_conn() as conn:
+            return conn.execute('SELECT COUNT(*) FROM images').fetchone()[0]
+    
+    def load_all_file_paths(self) -> set:
+        """
+        Load every cached file path into a set for O(1) membership tests.
+        
+        One sequential scan up-front instead of a per-file indexed SELECT
+        during directory discovery.
+        """
+        with self.get_read_conn() as conn:
+            return {row[0] for row in conn.execute('SELECT file_path FROM images')}
     
     def is_file_cached(self, file_path: str) -> bool:
         """Check if a file is already in the cache."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('SELECT 1 FROM images WHERE file_path = ? LIMIT 1', (file_path,))
-        exists = cursor.fetchone() is not None
-        conn.close()
-        return exists
+        with self.get_read_conn() as conn:
+            cursor = conn.execute('SELECT 1 FROM images WHERE file_path = ? LIMIT 1', (file_path,))
+            return cursor.fetchone() is not None
     
     # ==================== Notification Methods ====================
     
     def add_notification(self, type: str, message: str, device_id: str = None, 
                         date: str = None, count: int = 0) -> int:
         """Add a new notification."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO notifications (type, device_id, date, message, count)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (type, device_id, date, message, count))
-        
-        notification_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
-        return notification_id
+        with self.transaction() as conn:
+            cursor = conn.execute('''
+                INSERT INTO notifications (type, device_id, date, message, count)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (type, device_id, date, message, count))
+            
+            return cursor.lastrowid
     
     def get_notifications(self, unread_only: bool = False, limit: int = 50) -> List[Dict[str, Any]]:
         """Get notifications, optionally filtered to unread only."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        query = 'SELECT * FROM notifications'
-        if unread_only:
-            query += ' WHERE read = 0'
-        query += ' ORDER BY created_at DESC LIMIT ?'
-        
-        cursor.execute(query, (limit,))
-        results = [dict(row) for row in cursor.fetchall()]
-        conn.close()
-        return results
+        with self.get_read_conn() as conn:
+            query = 'SELECT * FROM notifications'
+            if unread_only:
+                query += ' WHERE read = 0'
+            query += ' ORDER BY created_at DESC LIMIT ?'
+            
+            cursor = conn.execute(query, (limit,))
+            return [dict(row) for row in cursor.fetchall()]
     
     def get_unread_count(self) -> int:
         """Get count of unread notifications."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('SELECT COUNT(*) FROM notifications WHERE read = 0')
-        count = cursor.fetchone()[0]
-        conn.close()
-        return count
+        with self.get_read_conn() as conn:
+            return conn.execute('SELECT COUNT(*) FROM notifications WHERE read = 0').fetchone()[0]
     
     def mark_notifications_read(self, notification_ids: List[int] = None):
         """Mark notifications as read. If no IDs provided, mark all as read."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        if notification_ids:
-            placeholders = ','.join('?' * len(notification_ids))
-            cursor.execute(f'UPDATE notifications SET read = 1 WHERE id IN ({placeholders})', notification_ids)
-        else:
-            cursor.execute('UPDATE notifications SET read = 1')
+        with self.transaction() as conn:
+            if notification_ids:
+                self._update_in_chunks(
+                    conn, 'UPDATE notifications SET read = 1 WHERE id IN ({})',
+                    notification_ids)
+            else:
+                conn.execute('UPDATE notifications SET read = 1')
+    
+    @staticmethod
+    def _update_in_chunks(conn, sql_template: str, ids: List[int], chunk: int = 500):
+        """Run an id-list UPDATE in fixed-size chunks inside the caller's
+        transaction.
         
-        conn.commit()
-        conn.close()
+        Keeps statements under SQLite's bound-parameter limit and reuses a
+        handful of prepared-statement shapes instead of one per list length.
+        """
+        for i in range(0, len(ids), chunk):
+            sub = ids[i:i + chunk]
+            conn.execute(sql_template.format(','.join('?' * len(sub))), sub)
     
     # ==================== Detection Methods ====================
     
     def insert_detection(self, image_id: int, class_name: str, confidence: float,
                         bbox: Tuple[float, float, float, float]) -> int:
         """Insert a detection result."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO detections (image_id, class_name, confidence, bbox_x1, bbox_y1, bbox_x2, bbox_y2)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (image_id, class_name, confidence, bbox[0], bbox[1], bbox[2], bbox[3]))
-        
-        detection_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
-        return detection_id
+        with self.transaction() as conn:
+            cursor = conn.execute('''
+                INSERT INTO detections (image_id, class_name, confidence, bbox_x1, bbox_y1, bbox_x2, bbox_y2)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (image_id, class_name, confidence, bbox[0], bbox[1], bbox[2], bbox[3]))
+            
+            return cursor.lastrowid
     
     def insert_detections_batch(self, detections: List[Dict[str, Any]]):
         """Insert multiple detections in a batch."""
         if not detections:
             return
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.executemany('''
-            INSERT INTO detections (image_id, class_name, confidence, bbox_x1, bbox_y1, bbox_x2, bbox_y2)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', [
-            (d['image_id'], d['class_name'], d['confidence'], 
-             d['bbox'][0], d['bbox'][1], d['bbox'][2], d['bbox'][3])
-            for d in detections
-        ])
+        with self.transaction() as conn:
+            conn.executemany('''
+                INSERT INTO detections (image_id, class_name, confidence, bbox_x1, bbox_y1, bbox_x2, bbox_y2)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', [
+                (d['image_id'], d['class_name'], d['confidence'], 
+                 d['bbox'][0], d['bbox'][1], d['bbox'][2], d['bbox'][3])
+                for d in detections
+            ])
+    
+    def store_detection_results(self, detections: List[Dict[str, Any]], image_ids: List[int]):
+        """Insert a batch of detections and mark their images processed.
         
-        conn.commit()
-        conn.close()
+        Both writes share one transaction, so an accumulated flush costs a
+        single commit/fsync and cannot leave images marked without their
+        detections (or vice versa).
+        """
+        if not detections and not image_ids:
+            return
+        with self.transaction() as conn:
+            if detections:
+                conn.executemany('''
+                    INSERT INTO detections (image_id, class_name, confidence, bbox_x1, bbox_y1, bbox_x2, bbox_y2)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', [
+                    (d['image_id'], d['class_name'], d['confidence'], 
+                     d['bbox'][0], d['bbox'][1], d['bbox'][2], d['bbox'][3])
+                    for d in detections
+                ])
+            if image_ids:
+                self._update_in_chunks(
+                    conn, 'UPDATE images SET detected = 1 WHERE id IN ({})', image_ids)
     
     def mark_image_detected(self, image_id: int):
         """Mark an image as having been processed for detection."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('UPDATE images SET detected = 1 WHERE id = ?', (image_id,))
-        conn.commit()
-        conn.close()
+        with self.transaction() as conn:
+            conn.execute('UPDATE images SET detected = 1 WHERE id = ?', (image_id,))
     
     def mark_images_detected_batch(self, image_ids: List[int]):
         """Mark multiple images as detected in batch."""
         if not image_ids:
             return
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        placeholders = ','.join('?' * len(image_ids))
-        cursor.execute(f'UPDATE images SET detected = 1 WHERE id IN ({placeholders})', image_ids)
-        conn.commit()
-        conn.close()
+        with self.transaction() as conn:
+            self._update_in_chunks(
+                conn, 'UPDATE images SET detected = 1 WHERE id IN ({})', image_ids)
     
     def get_undetected_images(self, limit: int = 1000) -> List[Dict[str, Any]]:
         """Get images that haven't been processed for detection yet."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT id, file_path, device_id, latitude, longitude, timestamp, link_id
-            FROM images
-            WHERE detected = 0
-            ORDER BY timestamp ASC
-            LIMIT ?
-        ''', (limit,))
-        
-        results = [dict(row) for row in cursor.fetchall()]
-        conn.close()
-        return results
+        with self.get_read_conn() as conn:
+            cursor = conn.execute('''
+                SELECT id, file_path, device_id, latitude, longitude, timestamp, link_id
+                FROM images
+                WHERE detected = 0
+                ORDER BY timestamp ASC
+                LIMIT ?
+            ''', (limit,))
+            return [dict(row) for row in cursor.fetchall()]
     
     def get_detections_for_trip(self, device_id: str, date: str) -> List[Dict[str, Any]]:
         """Get all detections for a specific trip with image info."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        date_pattern = date.replace('-', ':')
-        
-        cursor.execute('''
-            SELECT d.*, i.file_path, i.latitude, i.longitude, i.timestamp, i.link_id
-            FROM detections d
-            JOIN images i ON d.image_id = i.id
-            WHERE i.device_id = ? AND i.timestamp LIKE ?
-            ORDER BY i.timestamp ASC
-        ''', (device_id, f'{date_pattern}%'))
-        
-        results = [dict(row) for row in cursor.fetchall()]
-        conn.close()
-        return results
+        with self.get_read_conn() as conn:
+            cursor = conn.execute('''
+                SELECT d.*, i.file_path, i.latitude, i.longitude, i.timestamp, i.link_id
+                FROM detections d
+                JOIN images i ON d.image_id = i.id
+                WHERE i.device_id = ? AND i.trip_date = ?
+                ORDER BY i.timestamp ASC
+            ''', (device_id, date.replace('-', ':')))
+            return [dict(row) for row in cursor.fetchall()]
     
     def get_detection_stats(self) -> Dict[str, Any]:
         """Get overall detection statistics."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Total detections by class
-        cursor.execute('''
-            SELECT class_name, COUNT(*) as count
-            FROM detections
-            GROUP BY class_name
-        ''')
-        by_class = {row[0]: row[1] for row in cursor.fetchall()}
-        
-        # Total images processed
-        cursor.execute('SELECT COUNT(*) FROM images WHERE detected = 1')
-        images_processed = cursor.fetchone()[0]
-        
-        # Total images with detections
-        cursor.execute('SELECT COUNT(DISTINCT image_id) FROM detections')
-        images_with_detections = cursor.fetchone()[0]
-        
-        # Total detections
-        cursor.execute('SELECT COUNT(*) FROM detections')
-        total_detections = cursor.fetchone()[0]
-        
-        conn.close()
-        
-        return {
-            'by_class': by_class,
-            'images_processed': images_processed,
-            'images_with_detections': images_with_detections,
-            'total_detections': total_detections
-        }
+        return self._cached_read('detection_stats', self._load_detection_stats)
+    
+    def _load_detection_stats(self) -> Dict[str, Any]:
+        with self.get_read_conn() as conn:
+            # Total detections by class
+            cursor = conn.execute('''
+                SELECT class_name, COUNT(*) as count
+                FROM detections
+                GROUP BY class_name
+            ''')
+            by_class = {row[0]: row[1] for row in cursor.fetchall()}
+            
+            # Total images processed
+            images_processed = conn.execute('SELECT COUNT(*) FROM images WHERE detected = 1').fetchone()[0]
+            
+            # Total images with detections
+            images_with_detections = conn.execute('SELECT COUNT(DISTINCT image_id) FROM detections').fetchone()[0]
+            
+            # Total detections
+            total_detections = conn.execute('SELECT COUNT(*) FROM detections').fetchone()[0]
+            
+            return {
+                'by_class': by_class,
+                'images_processed': images_processed,
+                'images_with_detections': images_with_detections,
+                'total_detections': total_detections
+            }
     
     def get_image_by_id(self, image_id: int) -> Optional[Dict[str, Any]]:
         """Get image info by ID."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT * FROM images WHERE id = ?', (image_id,))
-        row = cursor.fetchone()
-        
-        conn.close()
-        return dict(row) if row else None
+        with self.get_read_conn() as conn:
+            row = conn.execute('SELECT * FROM images WHERE id = ?', (image_id,)).fetchone()
+            return dict(row) if row else None
     
     def get_detections_for_image(self, image_id: int) -> List[Dict[str, Any]]:
         """Get all detections for a specific image."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT * FROM detections WHERE image_id = ?
-        ''', (image_id,))
-        
-        results = [dict(row) for row in cursor.fetchall()]
-        conn.close()
-        return results
+        with self.get_read_conn() as conn:
+            cursor = conn.execute('''
+                SELECT * FROM detections WHERE image_id = ?
+            ''', (image_id,))
+            return [dict(row) for row in cursor.fetchall()]
+
+
+def _iter_jpgs(root: str):
+    """Yield .jpg file paths under root, skipping thumbnails directories.
+    
+    scandir-based: DirEntry carries the name and file type from the
+    directory read itself, so no per-file stat calls are issued.
+    """
+    try:
+        entries = os.scandir(root)
+    except OSError:
+        return
+    with entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                # Exclude thumbnails folders (no EXIF metadata)
+                if entry.name != 'thumbnails':
+                    yield from _iter_jpgs(entry.path)
+            elif entry.name.endswith(_JPG_SUFFIXES) or entry.name[-4:].lower() == '.jpg':
+                yield entry.path
 
 
 async def scan_and_cache_images(
@@ -666,24 +1074,21 @@ async def scan_and_cache_images(
         for trip in cache.get_trips(device_id):
             existing_devices[device_id].add(trip['date'])
     
+    # Load all cached paths once: set membership per file instead of an
+    # indexed SELECT per file
+    cached_paths = cache.load_all_file_paths()
+    
     # Discover all image files - scan all subdirectories (no camera type distinction)
     # Supports both old structure (101/, 32/) and flat structure
-    for root, dirs, files in os.walk(data_root):
-        # Exclude thumbnails folder (no EXIF metadata)
-        if 'thumbnails' in dirs:
-            dirs.remove('thumbnails')
-        
-        for file in files:
-            if file.lower().endswith('.jpg'):
-                file_path = os.path.join(root, file)
-                if not cache.is_file_cached(file_path):
-                    # Detect camera type from path if present, otherwise default to 'all'
-                    camera_type = 'all'
-                    if '/101/' in file_path or '\\101\\' in file_path:
-                        camera_type = '101'
-                    elif '/32/' in file_path or '\\32\\' in file_path:
-                        camera_type = '32'
-                    image_files.append((file_path, camera_type))
+    for file_path in _iter_jpgs(data_root):
+        if file_path not in cached_paths:
+            # Detect camera type from path if present, otherwise default to 'all'
+            camera_type = 'all'
+            if '/101/' in file_path or '\\101\\' in file_path:
+                camera_type = '101'
+            elif '/32/' in file_path or '\\32\\' in file_path:
+                camera_type = '32'
+            image_files.append((file_path, camera_type))
     
     total_files = len(image_files)
     if total_files == 0:
@@ -692,29 +1097,89 @@ async def scan_and_cache_images(
     
     print(f"Processing {total_files} new images...")
     
-    # Process in batches with thread pool
-    batch_size = 1000
-    processed = 0
-    
-    def process_image(args):
-        file_path, camera_type = args
-        return extract_metadata_from_image(file_path, camera_type)
+    # Pipelined producer/consumer: a process pool extracts EXIF (CPU-bound
+    # pure Python, so processes scale with cores) in small chunks that
+    # amortize the IPC, while a single writer thread drains results into
+    # large transactions. Extraction and commit/fsync overlap instead of
+    # alternating batch-at-a-time.
+    chunk_size = 64
+    insert_rows = 5000
+    sentinel = object()
+    results_q: queue.Queue = queue.Queue(maxsize=4000)
+    writer_error: List[BaseException] = []
+    writer_failed = threading.Event()
+
+    try:
+        executor = ProcessPoolExecutor(max_workers=max_workers)
+    except (OSError, ValueError) as e:
+        print(f"Warning: process pool unavailable ({e}), falling back to threads")
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def _writer():
+        pending = []
+
+        def flush():
+            if pending:
+                cache.insert_batch(_convert_dms_batch(pending))
+                pending.clear()
+
+        try:
+            while True:
+                item = results_q.get()
+                if item is sentinel:
+                    break
+                if item is not None:
+                    pending.append(item)
+                    if len(pending) >= insert_rows:
+                        flush()
+        except BaseException as e:
+            # A dead writer must not leave producers blocked on a full
+            # queue: record the failure, keep draining until the sentinel,
+            # and let the caller re-raise after join
+            writer_error.append(e)
+            writer_failed.set()
+            while results_q.get() is not sentinel:
+                pass
+            return
+        try:
+            flush()
+        except BaseException as e:
+            writer_error.append(e)
+            writer_failed.set()
+
+    with executor:
+        writer = threading.Thread(target=_writer, name='metadata-writer', daemon=True)
+        writer.start()
+        futures = [executor.submit(_extract_chunk, image_files[i:i + chunk_size])
+                   for i in range(0, total_files, chunk_size)]
+        processed = 0
+        try:
+            for future in as_completed(futures):
+                if writer_failed.is_set():
+                    for f in futures:
+                        f.cancel()
+                    break
+                items = future.result()
+                for item in items:
+                    results_q.put(item)
+                # Progress is reported per completed chunk here, not per
+                # database flush: flushes are 5000 rows apart, which reads
+                # as a frozen scan on modest datasets
+                processed += len(items)
+                if progress_callback:
+                    progress_callback(processed, total_files)
+                else:
+                    print(f"Progress: {processed}/{total_files} ({100*processed/total_files:.1f}%)")
+        finally:
+            results_q.put(sentinel)
+            writer.join()
+
+    if writer_error:
+        raise writer_error[0]
     
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        for i in range(0, total_files, batch_size):
-            batch = image_files[i:i + batch_size]
-            results = list(executor.map(process_image, batch))
-            
-            # Filter out None results and insert batch
-            valid_metadata = [m for m in results if m is not None]
-            if valid_metadata:
-                cache.insert_batch(valid_metadata)
-            
-            processed += len(batch)
-            if progress_callback:
-                progress_callback(processed, total_files)
-            else:
-                print(f"Progress: {processed}/{total_files} ({100*processed/total_files:.1f}%)")
+    # Refresh planner statistics so the new rows steer index selection
+    with cache.get_write_conn() as conn:
+        conn.execute('ANALYZE')
     
     # Detect new trips after scan
     new_trips = []
@@ -3,6 +3,7 @@ Scheduler Service for NYC Vehicle Surveillance System
 Schedules daily data scans and manages automatic updates.
 """
 import asyncio
+import logging
 from datetime import datetime, time
 from typing import Callable, Optional
 import pytz
@@ -18,6 +19,8 @@ KST = pytz.timezone('Asia/Seoul')
 DEFAULT_SCAN_HOUR = 22
 DEFAULT_SCAN_MINUTE = 0
 
+logger = logging.getLogger(__name__)
+
 
 class ScanScheduler:
     """Manages scheduled scanning tasks."""
@@ -42,9 +45,18 @@ class ScanScheduler:
         self.hour = hour
         self.minute = minute
         self.timezone = pytz.timezone(timezone)
+        # get_status is polled by the frontend: precompute the strings it
+        # returns instead of re-stringifying the tzinfo per request
+        self._tz_name = str(self.timezone)
+        self._schedule_str = f"{hour:02d}:{minute:02d} {self._tz_name}"
         self.scheduler = AsyncIOScheduler(timezone=self.timezone)
         self._job_id = 'daily_scan'
         self._is_running = False
+        # Loop captured at start() so trigger_now works from plain threads;
+        # in-flight manual scans are held here so the tasks cannot be
+        # garbage-collected before they finish
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._active_tasks = set()
     
     def start(self):
         """Start the scheduler."""
@@ -63,11 +75,16 @@ class ScanScheduler:
             replace_existing=True
         )
         
+        try:
+            self._loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._loop = None
+        
         self.scheduler.start()
         self._is_running = True
         
         next_run = self.get_next_run_time()
-        print(f"[Scheduler] Started. Next scan at: {next_run}")
+        logger.info("[Scheduler] Started. Next scan at: %s", next_run)
     
     def stop(self):
         """Stop the scheduler."""
@@ -76,23 +93,41 @@ class ScanScheduler:
         
         self.scheduler.shutdown()
         self._is_running = False
-        print("[Scheduler] Stopped")
+        logger.info("[Scheduler] Stopped")
     
     async def _run_scan(self):
         """Internal wrapper to run the scan callback."""
-        print(f"[Scheduler] Starting scheduled scan at {datetime.now(self.timezone)}")
+        logger.info("[Scheduler] Starting scheduled scan at %s", datetime.now(self.timezone))
         try:
             await self.scan_callback()
-            print("[Scheduler] Scheduled scan completed")
-        except Exception as e:
-            print(f"[Scheduler] Scan failed: {e}")
+            logger.info("[Scheduler] Scheduled scan completed")
+        except Exception:
+            logger.exception("[Scheduler] Scan failed")
     
     def trigger_now(self):
-        """Trigger a scan immediately."""
-        if self.scan_callback:
-            asyncio.create_task(self.scan_callback())
-            return True
-        return False
+        """Trigger a scan immediately.
+        
+        Works from both async and plain-thread contexts: inside a running
+        loop the scan becomes a task on it, otherwise it is dispatched onto
+        the loop captured at start(). The task reference is retained until
+        completion so it cannot be reaped mid-scan with its exception
+        silently dropped.
+        """
+        if not self.scan_callback:
+            return False
+        
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            if self._loop is None:
+                return False
+            task = asyncio.run_coroutine_threadsafe(self.scan_callback(), self._loop)
+        else:
+            task = loop.create_task(self.scan_callback())
+        
+        self._active_tasks.add(task)
+        task.add_done_callback(self._active_tasks.discard)
+        return True
     
     def get_next_run_time(self) -> Optional[datetime]:
         """Get the next scheduled run time."""
@@ -110,8 +145,8 @@ class ScanScheduler:
         return {
             'is_running': self._is_running,
             'next_run': next_run.isoformat() if next_run else None,
-            'schedule': f"{self.hour:02d}:{self.minute:02d} {self.timezone}",
-            'timezone': str(self.timezone)
+            'schedule': self._schedule_str,
+            'timezone': self._tz_name
         }
     
     def reschedule(self, hour: int, minute: int):
@@ -127,7 +162,8 @@ class ScanScheduler:
             )
             self.hour = hour
             self.minute = minute
-            print(f"[Scheduler] Rescheduled to {hour:02d}:{minute:02d}")
+            self._schedule_str = f"{hour:02d}:{minute:02d} {self._tz_name}"
+            logger.info("[Scheduler] Rescheduled to %02d:%02d", hour, minute)
 
 
 # Global scheduler instance
@@ -2,9 +2,40 @@
 Trip Builder Service
 Groups images into logical trips and generates GeoJSON for visualization.
 """
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
+import functools
 import json
+import sys
+
+import numpy as np
+
+# Optional orjson for fast C-level JSON serialization (stdlib json fallback)
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+
+# GeoJSON key/value strings, interned once at import. CPython auto-interns
+# identifier-like literals but not names like "LineString" or
+# "FeatureCollection"; sharing one object per string lets the O(N) feature
+# dicts reuse cached hashes and keeps a single copy in memory
+_K_TYPE = sys.intern("type")
+_K_GEOMETRY = sys.intern("geometry")
+_K_COORDS = sys.intern("coordinates")
+_K_PROPS = sys.intern("properties")
+_K_FEATURES = sys.intern("features")
+_V_FEATURE = sys.intern("Feature")
+_V_FEATURE_COLLECTION = sys.intern("FeatureCollection")
+_V_LINESTRING = sys.intern("LineString")
+_V_POINT = sys.intern("Point")
+
+# Constant key tuple for per-point GeoJSON properties: dict(zip(...)) against
+# one shared tuple beats re-interning eight literal keys per point
+_POINT_PROP_KEYS = ('type', 'index', 'file_path', 'timestamp', 'link_id',
+                    'forward', 'camera_type', 'device_id')
 
 
 @dataclass
@@ -17,29 +48,40 @@ class TripSegment:
     end_time: str
 
 
-def build_geojson_route(trip_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+def build_geojson_route(trip_data: List[Dict[str, Any]], serialize: bool = False):
     """
     Build a GeoJSON FeatureCollection from trip data.
     Creates a LineString for the route and Points for each image location.
+    
+    Args:
+        trip_data: Trip points from the metadata cache
+        serialize: When True, return serialized JSON bytes (via orjson when
+            installed) instead of a dict, skipping any intermediate
+            Python-level encoding by the caller
     """
     if not trip_data:
-        return {"type": "FeatureCollection", "features": []}
-    
-    features = []
+        collection = {_K_TYPE: _V_FEATURE_COLLECTION, _K_FEATURES: []}
+        return _dump_geojson(collection) if serialize else collection
     
     # Build the route LineString
     coordinates = []
     for point in trip_data:
         coordinates.append([point['longitude'], point['latitude']])
     
-    if len(coordinates) >= 2:
-        route_feature = {
-            "type": "Feature",
-            "geometry": {
-                "type": "LineString",
-                "coordinates": coordinates
+    # The feature count is known up front (one per point, plus the route
+    # line when there is one), so the list is allocated once at full size
+    # instead of growing through O(log N) append reallocations
+    has_route = len(coordinates) >= 2
+    features = [None] * (len(trip_data) + has_route)
+    
+    if has_route:
+        features[0] = {
+            _K_TYPE: _V_FEATURE,
+            _K_GEOMETRY: {
+                _K_TYPE: _V_LINESTRING,
+                _K_COORDS: coordinates
             },
-            "properties": {
+            _K_PROPS: {
                 "type": "route",
                 "device_id": trip_data[0].get('device_id'),
                 "start_time": trip_data[0].get('timestamp'),
@@ -47,33 +89,40 @@ def build_geojson_route(trip_data: List[Dict[str, Any]]) -> Dict[str, Any]:
                 "point_count": len(trip_data)
             }
         }
-        features.append(route_feature)
     
     # Build individual point features
-    for idx, point in enumerate(trip_data):
-        point_feature = {
-            "type": "Feature",
-            "geometry": {
-                "type": "Point",
-                "coordinates": [point['longitude'], point['latitude']]
+    offset = 1 if has_route else 0
+    for idx, (point, coord) in enumerate(zip(trip_data, coordinates)):
+        get = point.get
+        features[idx + offset] = {
+            _K_TYPE: _V_FEATURE,
+            _K_GEOMETRY: {
+                _K_TYPE: _V_POINT,
+                _K_COORDS: coord
             },
-            "properties": {
-                "type": "image_point",
-                "index": idx,
-                "file_path": point.get('file_path'),
-                "timestamp": point.get('timestamp'),
-                "link_id": point.get('link_id'),
-                "forward": point.get('forward'),
-                "camera_type": point.get('camera_type'),
-                "device_id": point.get('device_id')
-            }
+            _K_PROPS: dict(zip(_POINT_PROP_KEYS, (
+                'image_point', idx, get('file_path'), get('timestamp'),
+                get('link_id'), get('forward'), get('camera_type'),
+                get('device_id')
+            )))
         }
-        features.append(point_feature)
     
-    return {
-        "type": "FeatureCollection",
-        "features": features
+    collection = {
+        _K_TYPE: _V_FEATURE_COLLECTION,
+        _K_FEATURES: features
     }
+    
+    if serialize:
+        return _dump_geojson(collection)
+    
+    return collection
+
+
+def _dump_geojson(collection: Dict[str, Any]) -> bytes:
+    """Serialize a GeoJSON dict to UTF-8 bytes."""
+    if HAS_ORJSON:
+        return orjson.dumps(collection, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(collection).encode('utf-8')
 
 
 def build_link_network_geojson(links_data: List[Dict[str, Any]], cache) -> Dict[str, Any]:
@@ -89,12 +138,12 @@ def build_link_network_geojson(links_data: List[Dict[str, Any]], cache) -> Dict[
         
         if len(path) >= 2:
             feature = {
-                "type": "Feature",
-                "geometry": {
-                    "type": "LineString",
-                    "coordinates": path
+                _K_TYPE: _V_FEATURE,
+                _K_GEOMETRY: {
+                    _K_TYPE: _V_LINESTRING,
+                    _K_COORDS: path
                 },
-                "properties": {
+                _K_PROPS: {
                     "link_id": link_id,
                     "point_count": link['point_count'],
                     "center": link['center']
@@ -103,8 +152,8 @@ def build_link_network_geojson(links_data: List[Dict[str, Any]], cache) -> Dict[
             features.append(feature)
     
     return {
-        "type": "FeatureCollection",
-        "features": features
+        _K_TYPE: _V_FEATURE_COLLECTION,
+        _K_FEATURES: features
     }
 
 
@@ -113,31 +162,48 @@ def calculate_trip_stats(trip_data: List[Dict[str, Any]]) -> Dict[str, Any]:
     if not trip_data:
         return {}
     
-    # Calculate bounding box
-    lats = [p['latitude'] for p in trip_data]
-    lons = [p['longitude'] for p in trip_data]
+    n = len(trip_data)
     
     # Count unique links
     link_ids = set(p.get('link_id') for p in trip_data if p.get('link_id'))
     
+    # Bounding box and center: NumPy reductions over one contiguous array
+    # for real trips; below ~64 points the array setup costs more than the
+    # plain Python pass it replaces
+    if n < 64:
+        lats = [p['latitude'] for p in trip_data]
+        lons = [p['longitude'] for p in trip_data]
+        north, south = max(lats), min(lats)
+        east, west = max(lons), min(lons)
+        center_lat = sum(lats) / n
+        center_lon = sum(lons) / n
+    else:
+        coords = np.fromiter(
+            ((p['latitude'], p['longitude']) for p in trip_data),
+            dtype=np.dtype((np.float64, 2)), count=n
+        )
+        south, west = coords.min(axis=0).tolist()
+        north, east = coords.max(axis=0).tolist()
+        center_lat, center_lon = coords.mean(axis=0).tolist()
+    
     # Calculate time duration
     start_time = trip_data[0].get('timestamp', '')
     end_time = trip_data[-1].get('timestamp', '')
     
     return {
-        "total_images": len(trip_data),
+        "total_images": n,
         "unique_links": len(link_ids),
         "start_time": start_time,
         "end_time": end_time,
         "bounds": {
-            "north": max(lats),
-            "south": min(lats),
-            "east": max(lons),
-            "west": min(lons)
+            "north": north,
+            "south": south,
+            "east": east,
+            "west": west
         },
         "center": {
-            "latitude": sum(lats) / len(lats),
-            "longitude": sum(lons) / len(lons)
+            "latitude": center_lat,
+            "longitude": center_lon
         }
     }
 
@@ -184,62 +250,95 @@ def segment_trip_by_links(trip_data: List[Dict[str, Any]]) -> List[TripSegment]:
     return segments
 
 
+def _append_path_segment(path_data: List[Dict[str, Any]], link_id: Optional[int],
+                         first: Dict[str, Any], last: Dict[str, Any],
+                         coords: List[tuple], base_elevation: float):
+    """Emit one finished 3D path segment."""
+    forward = first.get('forward', True)
+    # link_id is constant within a segment by construction, so the elevation
+    # offset (visual effect keyed on link_id) is computed once here, not per
+    # point
+    elevation = base_elevation + (link_id % 100) * 0.5 if link_id else base_elevation
+    path_data.append({
+        "path": [[lng, lat, elevation] for lng, lat in coords],
+        "link_id": link_id,
+        "forward": forward,
+        "color": get_link_color(link_id, forward),
+        "width": 3,
+        "start_time": first.get('timestamp', ''),
+        "end_time": last.get('timestamp', '')
+    })
+
+
 def build_3d_path_data(trip_data: List[Dict[str, Any]], base_elevation: float = 0) -> List[Dict[str, Any]]:
     """
     Build path data suitable for deck.gl PathLayer with 3D coordinates.
     Groups consecutive points by link_id for segment coloring.
+    
+    Fused single pass: segments are emitted directly while walking the trip,
+    so no intermediate TripSegment point lists are materialized.
+    (segment_trip_by_links stays available for callers that want segments.)
     """
-    segments = segment_trip_by_links(trip_data)
+    if not trip_data:
+        return []
     
     path_data = []
-    for idx, segment in enumerate(segments):
-        if not segment.points:
-            continue
+    current_link = None
+    coords = []
+    seg_first = None
+    seg_last = None
+    
+    for point in trip_data:
+        link_id = point.get('link_id')
         
-        # Build 3D path coordinates [lng, lat, elevation]
-        path = []
-        for point in segment.points:
-            # Use link_id as a factor for elevation variation (visual effect)
-            elevation = base_elevation + (segment.link_id % 100) * 0.5 if segment.link_id else base_elevation
-            path.append([point['longitude'], point['latitude'], elevation])
+        if link_id != current_link and coords:
+            _append_path_segment(path_data, current_link, seg_first, seg_last,
+                                 coords, base_elevation)
+            coords = []
+            seg_first = None
         
-        path_data.append({
-            "path": path,
-            "link_id": segment.link_id,
-            "forward": segment.forward,
-            "color": get_link_color(segment.link_id, segment.forward),
-            "width": 3,
-            "start_time": segment.start_time,
-            "end_time": segment.end_time
-        })
+        current_link = link_id
+        if seg_first is None:
+            seg_first = point
+        seg_last = point
+        coords.append((point['longitude'], point['latitude']))
+    
+    # Don't forget the last segment
+    if coords and current_link:
+        _append_path_segment(path_data, current_link, seg_first, seg_last,
+                             coords, base_elevation)
     
     return path_data
 
 
-def get_link_color(link_id: Optional[int], forward: bool) -> List[int]:
+# Cyberpunk colors: cyan, magenta, yellow variations
+_LINK_COLORS = (
+    (0, 255, 247, 200),    # Cyan
+    (255, 0, 255, 200),    # Magenta
+    (255, 255, 0, 200),    # Yellow
+    (0, 255, 128, 200),    # Green-cyan
+    (255, 128, 0, 200),    # Orange
+    (128, 0, 255, 200),    # Purple
+)
+
+
+@functools.lru_cache(maxsize=256)
+def get_link_color(link_id: Optional[int], forward: bool) -> Tuple[int, ...]:
     """
     Generate a consistent color for a link_id.
     Uses cyberpunk color palette.
+    
+    Returns a tuple (there are only 12 distinct outputs) so results are
+    immutable and cacheable; json serializes tuples as arrays.
     """
     if link_id is None:
-        return [100, 100, 100, 200]  # Gray for unknown links
-    
-    # Cyberpunk colors: cyan, magenta, yellow variations
-    colors = [
-        [0, 255, 247, 200],    # Cyan
-        [255, 0, 255, 200],    # Magenta
-        [255, 255, 0, 200],    # Yellow
-        [0, 255, 128, 200],    # Green-cyan
-        [255, 128, 0, 200],    # Orange
-        [128, 0, 255, 200],    # Purple
-    ]
+        return (100, 100, 100, 200)  # Gray for unknown links
     
-    color_idx = link_id % len(colors)
-    color = colors[color_idx].copy()
+    color = _LINK_COLORS[link_id % len(_LINK_COLORS)]
     
     # Darken if going backward
     if not forward:
-        color = [int(c * 0.7) for c in color[:3]] + [color[3]]
+        color = tuple(int(c * 0.7) for c in color[:3]) + (color[3],)
     
     return color
 